@@ -0,0 +1,227 @@
+# cache.py
+"""
+Two-tier cache for state shared between processes.
+
+Reads go to a small in-process LRU first and to the Django cache (CACHES,
+Redis or files in production) after that. Local copies live for at most
+CACHE_LOCAL_TTL seconds, which bounds how long another process may keep
+serving an entry this one deleted. Every user gets its own namespace:
+
+    landing_cache = TieredCache('landing')
+    page = landing_cache.get_or_build('page', render, timeout=300)
+
+Counters that announce changes (`version` / `bump`) always read the shared
+tier, so they are seen by every process at once.
+
+The shared tier is an optimisation, never a dependency: when it fails (Redis
+down), reads count as misses, writes only reach the local tier, locks are
+not held and versions are unknown (None), so callers fall back to building
+values themselves and to their time-based refreshes. Every failure is logged.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Backends whose data other processes cannot see
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU whose entries expire after a few seconds."""
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        if not self.max_items:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_local = None
+
+
+def local_tier() -> LocalLRU:
+    """The LRU shared by every namespace of this process (created on first use)."""
+    global _local
+    if _local is None:
+        _local = LocalLRU(settings.CACHE_LOCAL_MAX_ITEMS, settings.CACHE_LOCAL_TTL)
+    return _local
+
+
+class TieredCache:
+    """
+    A namespace of the two-tier cache.
+
+    Args:
+        namespace: Prefix of every key, e.g. 'landing' -> 'landing:page'
+        alias: CACHES entry backing the shared tier
+    """
+
+    def __init__(self, namespace: str, alias: str = 'default'):
+        self.namespace = namespace
+        self.alias = alias
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def is_shared(self) -> bool:
+        """False when the backend only lives in this process (locmem in development)."""
+        return settings.CACHES[self.alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+    def key(self, name) -> str:
+        return f"{self.namespace}:{name}"
+
+    def _shared_call(self, operation: str, key, *args, failed=None):
+        """Run one operation on the shared tier; log and return `failed` if the backend is unreachable."""
+        try:
+            return getattr(self.shared, operation)(key, *args)
+        except Exception as e:
+            logger.warning(f"Shared cache {operation} of {key} failed: {str(e)}")
+            return failed
+
+    @staticmethod
+    def _local_ttl(timeout):
+        if isinstance(timeout, (int, float)) and timeout < settings.CACHE_LOCAL_TTL:
+            return timeout
+        return None  # the local tier's own CACHE_LOCAL_TTL
+
+    def get(self, name, default=None):
+        key = self.key(name)
+        value = local_tier().get(key)
+        if value is not _MISSING:
+            return value
+        value = self._shared_call('get', key, _MISSING, failed=_MISSING)
+        if value is _MISSING:
+            return default
+        local_tier().set(key, value)
+        return value
+
+    def set(self, name, value, timeout=DEFAULT_TIMEOUT) -> None:
+        """
+        Store `value` in both tiers.
+
+        `timeout` defaults to the backend's TIMEOUT; as in Django, None keeps
+        the shared copy until it is deleted or evicted. Local copies always
+        expire after CACHE_LOCAL_TTL at most.
+        """
+        key = self.key(name)
+        self._shared_call('set', key, value, timeout)
+        local_tier().set(key, value, self._local_ttl(timeout))
+
+    def delete(self, name) -> None:
+        key = self.key(name)
+        self._shared_call('delete', key)
+        local_tier().delete(key)
+
+    @contextmanager
+    def lock(self, name, timeout: float = None, wait: float = None):
+        """
+        Best-effort lock across processes, built on cache.add().
+
+        Yields True when this process holds the lock, or False when another
+        holder kept it for `wait` seconds (or the shared tier is unreachable);
+        callers decide whether to go on without it. The lock expires after
+        `timeout` seconds should its holder die. add() is atomic on Redis and
+        locmem; the file backend checks then writes, so there two processes
+        can rarely both win.
+        """
+        timeout = timeout or settings.CACHE_LOCK_TIMEOUT
+        wait = settings.CACHE_LOCK_WAIT if wait is None else wait
+        key = self.key(f"{name}:lock")
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        acquired = self._shared_call('add', key, token, timeout, failed=None)
+        while acquired is False and time.monotonic() < deadline:
+            time.sleep(0.05)
+            acquired = self._shared_call('add', key, token, timeout, failed=None)
+        acquired = bool(acquired)
+        try:
+            yield acquired
+        finally:
+            if acquired and self._shared_call('get', key) == token:
+                self._shared_call('delete', key)
+
+    def get_or_build(self, name, build, timeout=DEFAULT_TIMEOUT):
+        """
+        Cached value of `name`, calling `build()` to create it on a miss.
+
+        Only one process builds a missing entry at a time; the others wait
+        for its result (up to CACHE_LOCK_WAIT) instead of all rebuilding it.
+        `timeout` is passed to set().
+        """
+        value = self.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self.lock(name) as acquired:
+            # Whoever held the lock may have just stored it
+            value = self._shared_call('get', self.key(name), _MISSING, failed=_MISSING)
+            if value is _MISSING:
+                if not acquired:
+                    logger.warning(f"Building {self.key(name)} without the lock")
+                value = build()
+                self.set(name, value, timeout)
+            else:
+                local_tier().set(self.key(name), value)
+        return value
+
+    def version(self, name):
+        """Current value of a change counter (None when unknown, e.g. after a cache flush or outage)."""
+        return self._shared_call('get', self.key(f"{name}:version"))
+
+    def bump(self, name) -> None:
+        """Announce a change to every process watching `version(name)`."""
+        key = self.key(f"{name}:version")
+        try:
+            try:
+                self.shared.incr(key)
+            except ValueError:
+                # First change (or evicted): start from a value no earlier process can have seen,
+                # unless another process just did, in which case count on top of it
+                if not self.shared.add(key, time.time_ns(), None):
+                    self.shared.incr(key)
+        except Exception as e:
+            logger.warning(f"Could not bump {key}: {str(e)}")
@@ -0,0 +1,341 @@
+# metrics.py
+"""
+Request and hot-section timings, exposed on /metrics and the admin dashboard.
+
+Each process records into its own in-memory registry. With METRICS_DIR set,
+processes (gunicorn workers, the face worker, the mailer) periodically write
+a snapshot there and /metrics merges every recent snapshot, so a scrape sees
+the whole deployment rather than whichever worker answered it.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = 'sampleqr_request_seconds'
+REQUEST_DB_SECONDS = 'sampleqr_request_db_seconds'
+REQUEST_DB_QUERIES = 'sampleqr_request_db_queries_total'
+SECTION_SECONDS = 'sampleqr_section_seconds'
+
+HELP = {
+    REQUEST_SECONDS: ('histogram', "Time spent handling a request, by view."),
+    REQUEST_DB_SECONDS: ('histogram', "Database time per request, by view."),
+    REQUEST_DB_QUERIES: ('counter', "Database queries run by requests, by view."),
+    SECTION_SECONDS: ('histogram', "Time spent in instrumented code sections."),
+}
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, counts=None, total=0.0, count=0):
+        self.counts = counts or [0] * (len(BUCKETS) + 1)
+        self.sum = total
+        self.count = count
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts, total, count) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket, as Prometheus does."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[i - 1] if i else 0.0
+                if i == len(BUCKETS):
+                    return lower  # beyond the largest bound
+                return lower + (BUCKETS[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+
+class Registry:
+    """
+    Metrics of this process.
+
+    Besides the cumulative series exported to Prometheus, the last
+    METRICS_SUMMARY_MINUTES of each view and section are kept per minute for
+    the dashboard summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.counters = {}  # (name, labels) -> float
+        self.minutes = {}  # (kind, name, minute) -> [Histogram, db queries, db seconds]
+        self._last_flush = 0.0
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, labels: tuple, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + amount
+
+    def record_window(self, kind: str, name: str, seconds: float, queries: int = 0, db_seconds: float = 0.0) -> None:
+        minute = int(time.time() // 60)
+        with self._lock:
+            slot = self.minutes.get((kind, name, minute))
+            if slot is None:
+                slot = self.minutes[(kind, name, minute)] = [Histogram(), 0, 0.0]
+                self._drop_old_minutes(minute)
+            slot[0].observe(seconds)
+            slot[1] += queries
+            slot[2] += db_seconds
+
+    def _drop_old_minutes(self, minute: int) -> None:
+        # Caller holds self._lock
+        oldest = minute - settings.METRICS_SUMMARY_MINUTES
+        for key in [key for key in self.minutes if key[2] <= oldest]:
+            del self.minutes[key]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'updated': time.time(),
+                'histograms': [[name, list(labels), h.counts[:], h.sum, h.count]
+                               for (name, labels), h in self.histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'minutes': [[kind, name, minute, slot[0].counts[:], slot[0].sum, slot[0].count, slot[1], slot[2]]
+                            for (kind, name, minute), slot in self.minutes.items()],
+            }
+
+    def snapshot_path(self) -> str:
+        return os.path.join(settings.METRICS_DIR, f"{socket.gethostname()}-{os.getpid()}.json")
+
+    def flush(self) -> None:
+        """Write this process's snapshot to METRICS_DIR (atomically)."""
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        fd, partial_path = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(self.snapshot(), fh, separators=(',', ':'))
+            os.replace(partial_path, self.snapshot_path())
+        except Exception:
+            os.remove(partial_path)
+            raise
+
+    def maybe_flush(self) -> None:
+        if not settings.METRICS_DIR or time.monotonic() - self._last_flush < settings.METRICS_FLUSH_SECONDS:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {str(e)}")
+
+
+registry = Registry()
+
+
+@atexit.register
+def _flush_at_exit():
+    if settings.configured and getattr(settings, 'METRICS_DIR', ''):
+        try:
+            registry.flush()
+        except OSError:
+            pass
+
+
+class timed(ContextDecorator):
+    """
+    Time a named hot section, as a context manager or decorator:
+
+        with timed('qr_render'):
+            ...
+
+        @timed('smtp_send')
+        def send(...):
+    """
+
+    def __init__(self, section: str):
+        self.section = section
+
+    def _recreate_cm(self):
+        # A fresh timer per decorated call, so concurrent calls don't share `started`
+        return type(self)(self.section)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if settings.METRICS_ENABLED:
+            elapsed = time.perf_counter() - self.started
+            registry.observe(SECTION_SECONDS, (('section', self.section),), elapsed)
+            registry.record_window('section', self.section, elapsed)
+            registry.maybe_flush()
+        return False
+
+
+class QueryTimer:
+    """connection.execute_wrapper counting the queries of one request and the time they take."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+def record_request(view: str, method: str, status: int, seconds: float, queries: QueryTimer) -> None:
+    status_class = f"{status // 100}xx"
+    registry.observe(REQUEST_SECONDS, (('view', view), ('method', method), ('status', status_class)), seconds)
+    registry.observe(REQUEST_DB_SECONDS, (('view', view),), queries.seconds)
+    registry.inc(REQUEST_DB_QUERIES, (('view', view),), queries.queries)
+    registry.record_window('view', view, seconds, queries.queries, queries.seconds)
+    registry.maybe_flush()
+
+
+def collect() -> list:
+    """Snapshots of every live process (just this one without METRICS_DIR)."""
+    if not settings.METRICS_DIR:
+        return [registry.snapshot()]
+
+    registry.flush()
+    snapshots = []
+    oldest = time.time() - settings.METRICS_STALE_SECONDS
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        try:
+            with open(path) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue  # removed or replaced while we read it
+        if snapshot.get('updated', 0) < oldest:
+            try:
+                os.remove(path)  # process is gone
+            except OSError:
+                pass
+            continue
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _label_text(labels) -> str:
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+
+
+def render_prometheus(snapshots) -> str:
+    """Merge process snapshots into the Prometheus text exposition format."""
+    histograms = {}
+    counters = {}
+    for snapshot in snapshots:
+        for name, labels, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            histograms.setdefault(key, Histogram()).merge(counts, total, count)
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+
+    lines = []
+    for name, (kind, text) in HELP.items():
+        lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+        if kind == 'counter':
+            for (series, labels), value in sorted(counters.items()):
+                if series == name:
+                    lines.append(f"{name}{{{_label_text(labels)}}} {value:g}")
+            continue
+        for (series, labels), histogram in sorted(histograms.items()):
+            if series != name:
+                continue
+            label_text = _label_text(labels)
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else f"{bound:g}"
+                lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label_text}}} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+    return '\n'.join(lines) + '\n'
+
+
+def summary(snapshots=None) -> dict:
+    """
+    Rolling summary of the last METRICS_SUMMARY_MINUTES for the admin dashboard.
+
+    Returns:
+        {'views': [...], 'sections': [...]}, each row a dict with name,
+        count, per_minute, p50/p95/p99 and mean milliseconds (views also
+        carry mean queries and DB milliseconds), slowest p95 first
+    """
+    snapshots = collect() if snapshots is None else snapshots
+    oldest = int(time.time() // 60) - settings.METRICS_SUMMARY_MINUTES
+    merged = {}
+    for snapshot in snapshots:
+        for kind, name, minute, counts, total, count, queries, db_seconds in snapshot['minutes']:
+            if minute <= oldest:
+                continue
+            slot = merged.setdefault((kind, name), [Histogram(), 0, 0.0])
+            slot[0].merge(counts, total, count)
+            slot[1] += queries
+            slot[2] += db_seconds
+
+    rows = {'views': [], 'sections': []}
+    for (kind, name), (histogram, queries, db_seconds) in merged.items():
+        row = {
+            'name': name,
+            'count': histogram.count,
+            'per_minute': histogram.count / settings.METRICS_SUMMARY_MINUTES,
+            'p50_ms': histogram.quantile(0.5) * 1000,
+            'p95_ms': histogram.quantile(0.95) * 1000,
+            'p99_ms': histogram.quantile(0.99) * 1000,
+            'mean_ms': histogram.sum / histogram.count * 1000,
+        }
+        if kind == 'view':
+            row['queries'] = queries / histogram.count
+            row['db_ms'] = db_seconds / histogram.count * 1000
+        rows[kind + 's'].append(row)
+    for kind_rows in rows.values():
+        kind_rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: `Authorization: Bearer <METRICS_TOKEN>`, or a staff session."""
+    authorization = request.headers.get('Authorization', '')
+    token_ok = bool(settings.METRICS_TOKEN) and constant_time_compare(authorization, f"Bearer {settings.METRICS_TOKEN}")
+    if not token_ok and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
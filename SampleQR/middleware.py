@@ -1,18 +1,68 @@
 # bsi_project/middleware.py
-from django.http import Http404
-from django.shortcuts import render
-from django.urls import resolve
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponseNotFound
+from django.template.loader import render_to_string
+
+from .metrics import QueryTimer, record_request
+
+_not_found_page = None
+
+
+def not_found_response(request, exception=None):
+    """
+    The custom 404 page (also handler404).
+
+    It only uses {% static %}, so it is rendered once per process and reused;
+    with DEBUG it is rendered every time so template edits show up.
+    """
+    global _not_found_page
+    if _not_found_page is None or settings.DEBUG:
+        _not_found_page = render_to_string('404.html')
+    return HttpResponseNotFound(_not_found_page)
+
 
 class InvalidUrlMiddleware:
+    """
+    Serve the custom 404 page for URLs that match no pattern, DEBUG included.
+
+    Django already resolves every request, so instead of resolving a second
+    time up front this looks at the outcome: a 404 without a resolver_match
+    never reached a view. 404s returned by views pass through unchanged.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code == 404 and getattr(request, 'resolver_match', None) is None:
+            return not_found_response(request)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record each request's latency, query count and DB time per view (SampleQR.metrics).
+
+    Goes first in MIDDLEWARE so the other middleware is timed too. The body of
+    a streaming response is produced after this returns and is not included.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Check if the request URL matches any valid URL pattern
-        try:
-            resolve(request.path)  # Try to resolve the URL
-            response = self.get_response(request)  # Continue processing if valid
-        except Http404:
-            # If Http404 is raised (invalid URL), render the custom 404 page
-            return render(request, '404.html', status=404)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'  # keeps random 404 paths out of the labels
+        record_request(view, request.method, response.status_code, elapsed, queries)
         return response
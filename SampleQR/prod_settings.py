@@ -8,12 +8,21 @@ CSRF_TRUSTED_ORIGINS = config("CSRF_TRUSTED_ORIGINS", cast=Csv())
 
 CORS_ORIGIN_WHITELIST = config("CSRF_TRUSTED_ORIGINS", cast=Csv())
 
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django.core.cache.backends.redis.RedisCache",
-#         "LOCATION": config("REDIS_BACKEND"),
-#     },
-# }
+# Shared by every worker (see SampleQR.cache); files when no Redis is configured
+if config("REDIS_BACKEND", default=""):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": config("REDIS_BACKEND"),
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(BASE_DIR, "cache/"),
+        },
+    }
 
 DATABASES = {
     "default": {
@@ -30,6 +39,17 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "mediafiles/")
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles/")
+EXPORT_ROOT = os.path.join(BASE_DIR, "exports/")
+EXPORT_ACCEL_REDIRECT_PREFIX = "/protected-exports/"
+
+FACE_WORKER_SOCKET = config("FACE_WORKER_SOCKET", default=os.path.join(BASE_DIR, "run/face_worker.sock"))
+FACE_WORKER_PROCESSES = config("FACE_WORKER_PROCESSES", default=2, cast=int)
+
+QR_POOL_SIZE = config("QR_POOL_SIZE", default=64, cast=int)
+GATE_BUNDLE_KEY = config("GATE_BUNDLE_KEY", default="")
+
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_DIR = os.path.join(BASE_DIR, "metrics/")
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = config("EMAIL_HOST")
@@ -72,6 +72,8 @@ SIMPLE_JWT = {
 
 
 MIDDLEWARE = [
+    'SampleQR.middleware.MetricsMiddleware',
+    'corsheaders.middleware.CorsMiddleware',  # Before anything that can answer (CommonMiddleware's redirects)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,8 +81,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
     'SampleQR.middleware.InvalidUrlMiddleware',
 ]
 
@@ -121,6 +121,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # On disk rather than in memory, so tests that race threads wait on SQLite's lock instead of failing
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -182,3 +184,92 @@ EVENT_DATE = "March 10, 2025"
 
 
 DEFAULT_FROM_EMAIL="events@tinos.co.in"
+
+
+# Face recognition (verify_face_api)
+FACE_MODEL_NAME = "VGG-Face"
+FACE_DETECTOR_BACKEND = "opencv"
+FACE_MATCH_THRESHOLD = 0.68  # Max cosine distance between a frame and a participant photo
+FACE_INDEX_SYNC_SECONDS = 2  # How often each worker polls the embedding store for changes
+FACE_INDEX_SYNC_OVERLAP_SECONDS = 10  # Synced changes re-read for writes that commit after a later one
+FACE_SEARCH_BACKEND = "exact"  # "exact" or "ivf" (approximate, for 100k+ participants)
+FACE_IVF_LISTS = 0  # IVF cluster count; 0 picks sqrt(number of faces)
+FACE_IVF_NPROBE = 8  # Clusters scanned per query; higher trades speed for recall
+FACE_WORKER_SOCKET = ""  # Unix socket of `manage.py run_face_worker`; empty runs inference in-process
+FACE_WORKER_PROCESSES = 2
+FACE_WORKER_TIMEOUT = 10  # Seconds a web request waits for the face worker
+FACE_BATCH_MAX_SIZE = 8  # Frames embedded together in one forward pass
+FACE_BATCH_MAX_WAIT_MS = 10  # How long a frame waits for others to join its batch
+FACE_MAX_FRAME_SIDE = 640  # Camera frames are decoded/downscaled to at most this many pixels
+FACE_MAX_CLIENT_BOXES = 10  # Face boxes accepted from the gate page per frame
+FACE_CROP_MARGIN = 0.2  # Extra context kept around client-supplied face boxes
+FACE_CROP_DETECTOR_BACKEND = "skip"  # Detector run on client-cropped faces ("skip" trusts face-api.js)
+FACE_CACHE_TTL = 3  # Seconds a camera may reuse the result for a near-identical face (0 disables)
+FACE_CACHE_MAX_DISTANCE = 6  # Max differing bits between perceptual hashes of "the same" face
+FACE_CACHE_PER_CLIENT = 16
+FACE_CACHE_MAX_CLIENTS = 256
+
+# Registration QR email outbox (`manage.py send_qr_emails`)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_POLL_INTERVAL = 2  # Seconds between polls when the outbox is empty
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+EMAIL_OUTBOX_BASE_BACKOFF = 30  # Seconds before the first retry, doubled on each failure
+EMAIL_OUTBOX_MAX_BACKOFF = 3600
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600  # Reclaim emails a crashed worker left in "sending"
+EMAIL_CONNECTION_MAX_MESSAGES = 100  # Recycle the pooled SMTP connection after this many emails
+EMAIL_CONNECTION_IDLE_TIMEOUT = 60  # Close the pooled SMTP connection after this many idle seconds
+
+BULK_IMPORT_CHUNK_SIZE = 500  # Rows validated and inserted per bulk_create
+
+QR_MASK_PATTERN = 0  # Fixed QR mask (0-7); None searches all 8 for the best one, ~5x slower
+QR_POOL_SIZE = 0  # Pre-generated QR codes kept ready per worker for peak registration (0 disables)
+QR_RENDER_CACHE_SIZE = 2048  # Rendered QR images kept in memory per worker (~1.3 KiB each)
+QR_IMAGE_MAX_AGE = 31536000  # Cache-Control max-age of /qr/<token>.png; the image never changes
+
+QR_CODES_SINGLE_USE = True  # A QR code checks its participant in once; False allows re-entry
+QR_TOKEN_CACHE = True  # Reject unknown QR tokens from an in-process set before touching the DB
+QR_TOKEN_CACHE_REFRESH_SECONDS = 1  # Min interval between cache refreshes triggered by unknown tokens
+
+# Offline gate scanning (api/gate/bundle/, api/gate/sync/)
+GATE_BUNDLE_KEY = ""  # HMAC key the scanners verify bundles with; empty derives one from SECRET_KEY
+GATE_BUNDLE_DIGEST_CHARS = 16  # Hex characters of sha256(token) kept per participant in the bundle
+GATE_SYNC_MAX_SCANS = 1000  # Offline scans accepted per sync request
+
+EXPORT_CHUNK_SIZE = 2000  # Participants fetched per query while streaming exports
+
+PARTICIPANT_LIST_PAGE_SIZE = 100  # api/participants/ page size when no limit is given
+PARTICIPANT_LIST_MAX_PAGE_SIZE = 500
+
+# Two-tier cache (SampleQR.cache): a per-process LRU in front of CACHES['default']
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # Per process; production shares one
+    },
+}
+CACHE_LOCAL_MAX_ITEMS = 1024
+CACHE_LOCAL_TTL = 2  # Seconds a process reuses its local copy; bounds staleness after another process's delete
+CACHE_LOCK_TIMEOUT = 30  # Seconds before a rebuild lock of a crashed holder expires
+CACHE_LOCK_WAIT = 5  # Seconds a process waits for another one's rebuild before doing it itself
+
+LANDING_PAGE_CACHE_TIMEOUT = 300  # Seconds the rendered landing page is cached; edits invalidate it sooner
+
+# Photo thumbnails (media/thumbnails/), used by the Excel export, admin list and landing page
+THUMBNAIL_SIZE = 100  # Square edge in pixels; 2x the 50px the export and pages display
+THUMBNAIL_FORMAT = "JPEG"  # "JPEG" or "WEBP"
+THUMBNAIL_QUALITY = 80
+
+# Background export jobs (`manage.py run_export_jobs`)
+EXPORT_ROOT = os.path.join(BASE_DIR, 'exports')  # Not under MEDIA_ROOT: artifacts must not be public
+EXPORT_ACCEL_REDIRECT_PREFIX = ""  # nginx internal location serving EXPORT_ROOT; empty serves files from Django
+EXPORT_JOB_POLL_INTERVAL = 2  # Seconds the worker sleeps when no job is queued
+EXPORT_JOB_CLAIM_TIMEOUT = 600  # Reclaim jobs a crashed worker left running
+EXPORT_JOB_HEARTBEAT_SECONDS = 30  # How often a running job is touched; keep well below the claim timeout
+EXPORT_KEEP_ARTIFACTS = 2  # Finished artifacts kept per export kind
+
+# Request / hot-section metrics (/metrics, admin dashboard)
+METRICS_ENABLED = True
+METRICS_TOKEN = ""  # Bearer token Prometheus scrapes /metrics with; staff sessions need none
+METRICS_DIR = ""  # Shared directory where every process writes its snapshot; empty keeps metrics per process
+METRICS_FLUSH_SECONDS = 5  # Min interval between snapshot writes of a process
+METRICS_STALE_SECONDS = 3600  # Snapshots not updated for this long belong to exited processes
+METRICS_SUMMARY_MINUTES = 5  # Window of the dashboard summary
@@ -19,8 +19,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .metrics import metrics_view
+
+handler404 = 'SampleQR.middleware.not_found_response'
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('',include("testapp.urls")),
     path('',include("adminapp.urls")),
 ]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SampleQR.settings')
 
 application = get_wsgi_application()
+
+# Fill this worker's pool of pre-generated QR codes (off-thread) before the first
+# registrations arrive, instead of rendering their codes on the request path
+from testapp.qr_pool import qr_pool  # noqa: E402
+
+qr_pool.warm()
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 class ContactSubmission(models.Model):
     first_name = models.CharField(max_length=100)
@@ -25,4 +27,19 @@ class Testimonial(models.Model):
         return self.name
 
 
+@receiver(post_save, sender=Testimonial)
+def refresh_testimonial_thumbnail(sender, instance, raw=False, **kwargs):
+    """Thumbnail shown on the landing page, rendered in the background as soon as the photo is saved."""
+    if raw or not instance.user_image:
+        return
+    from testapp.thumbnails import schedule_thumbnail_refresh
+    name = instance.user_image.name
+    transaction.on_commit(lambda: schedule_thumbnail_refresh(name))
 
+
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+def drop_cached_landing_page(sender, **kwargs):
+    """Testimonials are the only data on the cached landing page."""
+    from testapp.landing import invalidate_landing_page
+    transaction.on_commit(invalidate_landing_page)
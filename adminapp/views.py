@@ -6,6 +6,7 @@ from django.shortcuts import render, redirect,  get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
+from testapp.landing import invalidate_landing_page
 
 
 def admin_login(request):
@@ -35,7 +36,10 @@ def admin_login(request):
 
 @user_passes_test(is_admin, login_url='admin_login')
 def admin_dashboard(request):
-    return render(request, "admin/admin_index.html")  # Admin-only dashboard
+    from SampleQR.metrics import summary
+    from django.conf import settings
+    context = {"metrics": summary(), "metrics_minutes": settings.METRICS_SUMMARY_MINUTES}
+    return render(request, "admin/admin_index.html", context)  # Admin-only dashboard
 
 def admin_logout(request):
     logout(request)
@@ -82,6 +86,7 @@ def add_or_edit_testimonial(request, testimonial_id=None):
         form = TestimonialForm(request.POST, request.FILES, instance=testimonial)
         if form.is_valid():
             form.save()
+            invalidate_landing_page()
             messages.success(request, "Testimonial saved successfully!")
             return redirect("testimonial_list")
         else:
@@ -94,5 +99,6 @@ def add_or_edit_testimonial(request, testimonial_id=None):
 def delete_testimonial(request, id):
     testimonial = get_object_or_404(Testimonial, id=id)
     testimonial.delete()
+    invalidate_landing_page()
     return redirect('testimonial_list')
 
@@ -13,9 +13,11 @@ document.getElementById('contact-form').addEventListener('submit', function(e) {
     // Get form data
     const formData = new FormData(form);
     
-    // Send the request
+    // Send the request; the page is cached for everyone, so the CSRF token comes from the cookie
+    const csrfCookie = document.cookie.split('; ').find(row => row.startsWith('csrftoken='));
     fetch('/submit-contact/', {
         method: 'POST',
+        headers: csrfCookie ? {'X-CSRFToken': csrfCookie.split('=')[1]} : {},
         body: formData
     })
     .then(response => response.json())
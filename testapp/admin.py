@@ -1,8 +1,11 @@
 # admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.urls import reverse
 from django.utils.html import format_html
-from .models import User, Participant
+from .checkin import is_valid_token
+from .models import ExportJob, User, Participant
+from .thumbnails import thumbnail_url
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -27,15 +30,28 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(Participant)
 class ParticipantAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'phone_number', 'designation', 
-                   'qr_verified', 'verified_by_display', 'verified_at', 
+    list_display = ('photo_thumbnail', 'username', 'email', 'phone_number', 'designation', 
+                   'qr_verified', 'email_status', 'verified_by_display', 'verified_at', 
                    'registered_by_display', 'created_at')
     
-    list_filter = ('qr_verified', 'verified_at', 'created_at', 'designation')
+    list_filter = ('qr_verified', 'email_status', 'verified_at', 'created_at', 'designation')
     search_fields = ('username', 'email', 'phone_number')
-    readonly_fields = ('qr_code_data', 'created_at', 'updated_at')
+    readonly_fields = ('qr_code_preview', 'qr_code_data', 'created_at', 'updated_at')
     ordering = ('-created_at',)
 
+    def photo_thumbnail(self, obj):
+        if not obj.user_image:
+            return "-"
+        return format_html('<img src="{}" width="40" height="40" alt="">', thumbnail_url(obj.user_image.name))
+    photo_thumbnail.short_description = 'Photo'
+
+    def qr_code_preview(self, obj):
+        if not is_valid_token(obj.qr_code_data):
+            return "-"
+        url = reverse('qr_code_image', kwargs={'token': obj.qr_code_data, 'fmt': 'svg'})
+        return format_html('<img src="{}" width="160" height="160" alt="QR code">', url)
+    qr_code_preview.short_description = 'QR Code'
+
     def verified_by_display(self, obj):
         if obj.verified_by:
             return f"{obj.verified_by.username} ({obj.verified_by.email})"
@@ -53,7 +69,7 @@ class ParticipantAdmin(admin.ModelAdmin):
             'fields': ('username', 'email', 'phone_number', 'designation', 'user_image')
         }),
         ('QR Code Information', {
-            'fields': ('qr_code', 'qr_code_data', 'qr_verified')
+            'fields': ('qr_code_preview', 'qr_code_data', 'qr_verified', 'email_status')
         }),
         ('Verification Details', {
             'fields': ('verified_by', 'verified_at')
@@ -66,4 +82,12 @@ class ParticipantAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not change:  # If this is a new participant
             obj.registered_by = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'processed', 'total', 'size', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('source_signature', 'artifact', 'size', 'processed', 'total', 'error',
+                       'created_at', 'updated_at', 'started_at', 'finished_at')
+    ordering = ('-created_at',)
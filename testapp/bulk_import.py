@@ -0,0 +1,178 @@
+# bulk_import.py
+import csv
+import io
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .checkin import announce_new_tokens, token_cache
+from .models import EmailOutbox, Participant
+from .serializers import ParticipantImportRowSerializer
+from .utils import new_qr_token
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('username', 'email', 'phone_number', 'designation')
+
+
+class ImportFileError(Exception):
+    """The uploaded file cannot be read as a participant sheet."""
+
+
+def _normalise_header(value) -> str:
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _rows_from_table(header, rows):
+    header = [_normalise_header(cell) for cell in header]
+    missing = [column for column in COLUMNS if column not in header]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+    positions = {column: header.index(column) for column in COLUMNS}
+
+    for row in rows:
+        if not any(cell not in (None, '') for cell in row):
+            continue  # blank line
+        yield {
+            column: ('' if position >= len(row) or row[position] is None else str(row[position]).strip())
+            for column, position in positions.items()
+        }
+
+
+def read_rows(upload):
+    """
+    Read participant rows from an uploaded CSV or XLSX file.
+
+    Returns:
+        Iterator of dicts with the COLUMNS keys, in file order
+    """
+    name = upload.name.lower()
+    if name.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        try:
+            sheet = load_workbook(upload, read_only=True, data_only=True).active
+        except Exception:
+            raise ImportFileError("Unreadable XLSX file")
+        rows = sheet.iter_rows(values_only=True)
+    elif name.endswith('.csv'):
+        rows = csv.reader(io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''))
+    else:
+        raise ImportFileError("Upload a .csv or .xlsx file")
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFileError("The file is empty")
+    return _rows_from_table(header, rows)
+
+
+def _validate_chunk(chunk, seen_emails, seen_phones):
+    """Split (row_number, row) pairs into valid rows and per-row error results."""
+    valid, errors = [], []
+    # Emails are compared exactly, like the unique constraint and the registration serializer
+    emails = {row.get('email', '') for _, row in chunk}
+    phones = {row.get('phone_number', '') for _, row in chunk}
+    taken_emails = set(Participant.objects.filter(email__in=emails).values_list('email', flat=True))
+    taken_phones = set(Participant.objects.filter(phone_number__in=phones).values_list('phone_number', flat=True))
+
+    for row_number, row in chunk:
+        serializer = ParticipantImportRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'row': row_number, 'status': 'error', 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+        row_errors = {}
+        if data['email'] in taken_emails or data['email'] in seen_emails:
+            row_errors['email'] = ["Email already registered."]
+        if data['phone_number'] in taken_phones or data['phone_number'] in seen_phones:
+            row_errors['phone_number'] = ["Phone number already registered."]
+        if row_errors:
+            errors.append({'row': row_number, 'status': 'error', 'errors': row_errors})
+            continue
+        seen_emails.add(data['email'])
+        seen_phones.add(data['phone_number'])
+        valid.append((row_number, data))
+    return valid, errors
+
+
+def _insert(participants, send_email):
+    with transaction.atomic():
+        created = Participant.objects.bulk_create(participants)
+        if send_email:
+            EmailOutbox.objects.bulk_create([EmailOutbox(participant=participant) for participant in created])
+    return created
+
+
+def _insert_one_by_one(rows, participants, send_email):
+    """Fallback when a concurrent registration raced the chunk's uniqueness check."""
+    for (row_number, _), participant in zip(rows, participants):
+        try:
+            _insert([participant], send_email)
+        except IntegrityError:
+            yield {'row': row_number, 'status': 'error', 'errors': {'non_field_errors': ["Already registered."]}}
+        else:
+            token_cache.add(participant.qr_code_data)
+            announce_new_tokens()
+            yield {'row': row_number, 'status': 'created', 'id': participant.pk}
+
+
+def import_participants(rows, registered_by, send_email: bool = True, chunk_size: int = None):
+    """
+    Validate participants, issue their QR tokens and insert them in chunks.
+
+    Args:
+        rows: Iterable of row dicts (see read_rows)
+        registered_by: User recorded as the registering volunteer
+        send_email: Queue the QR email for every created participant
+        chunk_size: Rows per validation query / bulk_create (BULK_IMPORT_CHUNK_SIZE)
+
+    Yields:
+        One result dict per row, then a final {'status': 'done', ...} summary
+    """
+    chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+    seen_emails, seen_phones = set(), set()
+    created_count = error_count = 0
+
+    def process(chunk):
+        nonlocal created_count, error_count
+        valid, errors = _validate_chunk(chunk, seen_emails, seen_phones)
+        error_count += len(errors)
+        yield from errors
+        if not valid:
+            return
+
+        # QR images are rendered on request from the token, so nothing is drawn or written here
+        participants = [
+            Participant(**data, qr_code_data=new_qr_token(data['username']), registered_by=registered_by)
+            for _, data in valid
+        ]
+        try:
+            _insert(participants, send_email)
+            for participant in participants:
+                token_cache.add(participant.qr_code_data)
+            announce_new_tokens()  # bulk_create sends no post_save
+            results = [
+                {'row': row_number, 'status': 'created', 'id': participant.pk}
+                for (row_number, _), participant in zip(valid, participants)
+            ]
+        except IntegrityError:
+            results = list(_insert_one_by_one(valid, participants, send_email))
+
+        for result in results:
+            if result['status'] == 'created':
+                created_count += 1
+            else:
+                error_count += 1
+            yield result
+
+    chunk = []
+    for row_number, row in enumerate(rows, start=2):  # row 1 is the header
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            yield from process(chunk)
+            chunk = []
+    if chunk:
+        yield from process(chunk)
+
+    yield {'status': 'done', 'created': created_count, 'errors': error_count}
@@ -0,0 +1,295 @@
+# checkin.py
+import logging
+import re
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from SampleQR.cache import TieredCache
+
+from .models import Participant, User
+
+logger = logging.getLogger(__name__)
+
+# Tokens are sha256 hex digests (utils.new_qr_token)
+TOKEN_RE = re.compile(r'[0-9a-f]{64}')
+
+CHECKED_IN = 'checked_in'
+ALREADY_CHECKED_IN = 'already_checked_in'
+INVALID = 'invalid'
+
+# Everything ParticipantSerializer reads, so the response needs no further queries.
+# Kept in model field order, which Participant.from_db relies on.
+RESPONSE_FIELDS = (
+    'id', 'username', 'email', 'phone_number', 'designation', 'user_image', 'qr_code_data',
+    'qr_verified', 'email_status', 'registered_by_id', 'verified_at', 'created_at',
+)
+
+
+def is_valid_token(token) -> bool:
+    return isinstance(token, str) and TOKEN_RE.fullmatch(token) is not None
+
+
+def parse_timestamp(value):
+    """
+    An ISO 8601 timestamp sent by a client, as an aware datetime.
+
+    Naive values are taken to be in the server's time zone. Returns None for
+    anything that is not a valid timestamp, including well-formed but
+    impossible ones like 2024-13-01T00:00:00.
+    """
+    try:
+        parsed = parse_datetime(str(value))
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+shared_tokens = TieredCache('qr_tokens')
+
+
+def announce_new_tokens() -> None:
+    """Tell every worker's TokenCache that participants were registered (after commit)."""
+    shared_tokens.bump('tokens')
+
+
+class TokenCache:
+    """
+    In-process set of the QR tokens that exist, so garbage scans never reach the DB.
+
+    Only the first 64 bits of each token are kept (tokens are uniformly random
+    hashes); a false positive simply falls through to the database. New
+    registrations from other workers are picked up by an incremental refresh
+    when a scan misses the cache. With a shared cache backend that happens
+    only after a registration was announced (announce_new_tokens). Without
+    announcements (a process-local backend, or the shared cache is down) the
+    cache refreshes at most every `refresh_seconds`, and between refreshes a
+    miss is only a "maybe": the scan goes on to the database.
+    """
+
+    # Registrations that committed late (long transactions) are still caught
+    LOOKBACK = timedelta(seconds=60)
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._keys = set()
+        self._loaded = False
+        self._synced_at = None
+        self._last_refresh = 0.0
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> int:
+        return int(token[:16], 16)
+
+    def add(self, token: str) -> None:
+        if is_valid_token(token):
+            self._keys.add(self._key(token))
+
+    def _refresh(self) -> None:
+        # Caller holds self._lock
+        started = timezone.now()
+        queryset = Participant.objects.values_list('qr_code_data', flat=True)
+        if self._loaded:
+            queryset = queryset.filter(created_at__gte=self._synced_at - self.LOOKBACK)
+        self._keys.update(self._key(token) for token in queryset.iterator(chunk_size=5000) if is_valid_token(token))
+        self._loaded = True
+        self._synced_at = started
+        self._last_refresh = time.monotonic()
+
+    def __contains__(self, token: str) -> bool:
+        """False only when the token certainly does not exist."""
+        key = self._key(token)
+        if self._loaded and key in self._keys:
+            return True
+        with self._lock:
+            version = shared_tokens.version('tokens') if shared_tokens.is_shared else None
+            if version is not None and self._loaded:
+                if version != self._version:
+                    self._refresh()
+                    self._version = version  # read before refreshing, so a later announcement is not missed
+                return key in self._keys
+
+            if not self._loaded or time.monotonic() - self._last_refresh >= self.refresh_seconds:
+                self._refresh()
+                self._version = version
+                return key in self._keys
+        # Another worker may have registered it since the last refresh; let the database decide
+        return True
+
+
+token_cache = TokenCache(settings.QR_TOKEN_CACHE_REFRESH_SECONDS)
+
+
+def _supports_returning() -> bool:
+    if connection.vendor == 'postgresql':
+        return True
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def _field(name: str):
+    return Participant._meta.get_field('registered_by' if name == 'registered_by_id' else name)
+
+
+def _from_row(row, user: User) -> Participant:
+    """Build the checked-in participant from a RETURNING row, applying the ORM's value converters."""
+    fields = [_field(name) for name in RESPONSE_FIELDS]
+    values = []
+    for field, value in zip(fields, row):
+        column = field.get_col(Participant._meta.db_table)
+        for converter in connection.ops.get_db_converters(column) + column.get_db_converters(connection):
+            value = converter(value, column, connection)
+        values.append(value)
+
+    participant = Participant.from_db(connection.alias, [field.attname for field in fields], values)
+    participant.verified_by = user
+    if participant.registered_by_id is not None:
+        participant.registered_by = User(id=participant.registered_by_id, username=row[len(fields)])
+    return participant
+
+
+def _update_returning(token: str, user: User, single_use: bool, now):
+    quote = connection.ops.quote_name
+    table = quote(Participant._meta.db_table)
+
+    def column(name, qualified=True):
+        name = quote(_field(name).column)
+        return f"{table}.{name}" if qualified else name
+
+    assignments = ', '.join(
+        f"{column(name, qualified=False)} = %s" for name in ('qr_verified', 'verified_by', 'verified_at', 'updated_at')
+    )
+    sql = f"UPDATE {table} SET {assignments} WHERE {column('qr_code_data')} = %s"
+    stamp = connection.ops.adapt_datetimefield_value(now)
+    params = [single_use, user.pk, stamp, stamp, token]
+    if single_use:
+        sql += f" AND {column('qr_verified')} = %s"
+        params.append(False)
+    sql += (
+        f" RETURNING {', '.join(column(name) for name in RESPONSE_FIELDS)}, "
+        f"(SELECT {quote('username')} FROM {quote(User._meta.db_table)} "
+        f"WHERE {quote('id')} = {column('registered_by_id')})"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return _from_row(row, user) if row else None
+
+
+def _update_then_select(token: str, user: User, single_use: bool, now):
+    queryset = Participant.objects.filter(qr_code_data=token)
+    if single_use:
+        queryset = queryset.filter(qr_verified=False)
+    if not queryset.update(qr_verified=single_use, verified_by=user, verified_at=now, updated_at=now):
+        return None
+    participant = (
+        Participant.objects
+        .select_related('registered_by')
+        .only(*[name for name in RESPONSE_FIELDS if name != 'registered_by_id'], 'registered_by__username')
+        .get(qr_code_data=token)
+    )
+    participant.verified_by = user
+    return participant
+
+
+def check_in(token, user: User):
+    """
+    Check a participant in by QR token with a single conditional UPDATE.
+
+    With QR_CODES_SINGLE_USE the update only matches a participant who has
+    not been checked in yet, so of any number of concurrent scans of one code
+    exactly one succeeds. Otherwise every scan records who scanned it last.
+
+    Returns:
+        Tuple of (outcome, participant): CHECKED_IN with the updated
+        participant, or ALREADY_CHECKED_IN / INVALID with None
+    """
+    if not is_valid_token(token):
+        return INVALID, None
+    if settings.QR_TOKEN_CACHE and token not in token_cache:
+        return INVALID, None
+
+    single_use = settings.QR_CODES_SINGLE_USE
+    now = timezone.now()
+    update = _update_returning if _supports_returning() else _update_then_select
+    participant = update(token, user, single_use, now)
+    if participant is not None:
+        return CHECKED_IN, participant
+
+    if single_use and Participant.objects.filter(qr_code_data=token).exists():
+        return ALREADY_CHECKED_IN, None
+    return INVALID, None
+
+
+def sync_offline_scans(scans, user: User):
+    """
+    Apply check-ins recorded by a scanner while it was offline.
+
+    Args:
+        scans: List of {"qr_code_data": token, "scanned_at": ISO timestamp}
+        user: Volunteer the device is logged in as
+
+    Returns:
+        One result per scan, in input order: CHECKED_IN when this scan is
+        the participant's recorded entry, ALREADY_CHECKED_IN (with the
+        recorded verified_at) when an earlier scan holds it, or INVALID.
+
+    With QR_CODES_SINGLE_USE the earliest scan wins, wherever it came from:
+    a conditional UPDATE replaces the recorded check-in only when this scan
+    predates it, so devices can sync in any order, concurrently, and more
+    than once. Otherwise the latest scan is recorded, as for online scans.
+    """
+    single_use = settings.QR_CODES_SINGLE_USE
+    now = timezone.now()
+    results = [None] * len(scans)
+    pending = {}  # token -> [(scanned_at, index), ...]
+
+    for index, scan in enumerate(scans):
+        token = scan.get('qr_code_data') if isinstance(scan, dict) else None
+        # A scan with a bad timestamp is reported on its own; the rest of the batch still applies
+        scanned_at = parse_timestamp(scan.get('scanned_at') or '') if isinstance(scan, dict) else None
+        if not is_valid_token(token) or scanned_at is None:
+            results[index] = {'index': index, 'status': INVALID}
+            continue
+        pending.setdefault(token, []).append((min(scanned_at, now), index))  # device clocks run fast too
+
+    participants = dict(
+        Participant.objects.filter(qr_code_data__in=list(pending)).values_list('qr_code_data', 'id')
+    )
+    with transaction.atomic():
+        for token, token_scans in pending.items():
+            participant_id = participants.get(token)
+            token_scans.sort()
+            if participant_id is None:
+                for _, index in token_scans:
+                    results[index] = {'index': index, 'status': INVALID}
+                continue
+
+            scanned_at, winner = token_scans[0] if single_use else token_scans[-1]
+            queryset = Participant.objects.filter(pk=participant_id)
+            if single_use:
+                queryset = queryset.filter(Q(qr_verified=False) | Q(verified_at__gt=scanned_at))
+            else:
+                queryset = queryset.filter(Q(verified_at__isnull=True) | Q(verified_at__lt=scanned_at))
+            queryset.update(qr_verified=single_use, verified_by=user, verified_at=scanned_at, updated_at=now)
+
+            recorded_at = Participant.objects.filter(pk=participant_id).values_list('verified_at', flat=True).first()
+            for scan_at, index in token_scans:
+                accepted = not single_use or (index == winner and scan_at == recorded_at)
+                results[index] = {
+                    'index': index,
+                    'status': CHECKED_IN if accepted else ALREADY_CHECKED_IN,
+                    'participant_id': participant_id,
+                    'verified_at': recorded_at.isoformat() if recorded_at else None,
+                }
+    return results
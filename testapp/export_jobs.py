@@ -0,0 +1,182 @@
+# export_jobs.py
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from SampleQR.cache import TieredCache
+from SampleQR.metrics import timed
+
+from .models import ExportJob, Participant
+
+logger = logging.getLogger(__name__)
+
+export_cache = TieredCache('exports')
+
+ARTIFACTS = {
+    'xlsx': ('participants_with_images.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'zip': ('participant_images.zip', 'application/zip'),
+}
+
+
+def _builder(kind: str):
+    # openpyxl stays out of the web process until a build actually runs
+    from .exports import write_images_zip, write_participants_workbook
+    return {'xlsx': write_participants_workbook, 'zip': write_images_zip}[kind]
+
+
+def source_signature() -> str:
+    """Identifies the participant data an export reflects: row count plus the latest change."""
+    summary = Participant.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    last = summary['last'].isoformat() if summary['last'] else '-'
+    return f"{summary['count']}:{last}"
+
+
+def artifact_path(job: ExportJob) -> str:
+    return os.path.join(settings.EXPORT_ROOT, job.artifact)
+
+
+def request_export(kind: str, user):
+    """
+    Return the export job serving `kind` for the current data, queueing one if needed.
+
+    A finished artifact of unchanged data is reused as is, and a job that is
+    already queued or running for it is shared instead of starting another.
+    Concurrent requests for the same data are serialised by a cache lock, so
+    two workers cannot both queue it.
+
+    Returns:
+        Tuple of (job, created)
+    """
+    signature = source_signature()
+    with export_cache.lock(f"{kind}:{signature}"):
+        existing = (
+            ExportJob.objects
+            .filter(kind=kind, source_signature=signature, status__in=['pending', 'running', 'done'])
+            .order_by('-created_at')
+            .first()
+        )
+        if existing is not None and (existing.status != 'done' or os.path.exists(artifact_path(existing))):
+            return existing, False
+        return ExportJob.objects.create(kind=kind, source_signature=signature, requested_by=user), True
+
+
+def claim_next_job():
+    """Mark the oldest queued job (or one a dead worker left running) as running and return it."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.EXPORT_JOB_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        job = (
+            ExportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='running', updated_at__lt=stale))
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        ExportJob.objects.filter(pk=job.pk).update(status='running', started_at=now, updated_at=now)
+    job.refresh_from_db()
+    return job
+
+
+def _expire_older(job: ExportJob) -> None:
+    """Keep only the newest EXPORT_KEEP_ARTIFACTS finished artifacts of each kind."""
+    finished = ExportJob.objects.filter(kind=job.kind, status='done').order_by('-finished_at')
+    for old in finished[settings.EXPORT_KEEP_ARTIFACTS:]:
+        try:
+            os.remove(artifact_path(old))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove export {old.artifact}: {str(e)}")
+            continue
+        ExportJob.objects.filter(pk=old.pk).update(status='expired', updated_at=timezone.now())
+
+
+@contextmanager
+def _heartbeat(job: ExportJob):
+    """
+    Touch the job row every EXPORT_JOB_HEARTBEAT_SECONDS while it is built.
+
+    Progress is only reported per chunk and not at all while the workbook is
+    saved, so without this a large export could outlive
+    EXPORT_JOB_CLAIM_TIMEOUT and be claimed by a second worker.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.EXPORT_JOB_HEARTBEAT_SECONDS):
+                try:
+                    ExportJob.objects.filter(pk=job.pk, status='running').update(updated_at=timezone.now())
+                except Exception as e:
+                    logger.warning(f"Export job {job.pk} heartbeat failed: {str(e)}")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'export-heartbeat-{job.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job: ExportJob) -> None:
+    """Build the job's artifact on disk, reporting progress on the job row."""
+    os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+    extension = ARTIFACTS[job.kind][0].rsplit('.', 1)[1]
+    job.artifact = f"{job.kind}-{job.pk}.{extension}"
+    final_path = artifact_path(job)
+    partial_path = final_path + '.part'
+
+    total = Participant.objects.count()
+    ExportJob.objects.filter(pk=job.pk).update(total=total, processed=0, artifact='', updated_at=timezone.now())
+
+    def progress(processed):
+        ExportJob.objects.filter(pk=job.pk).update(processed=processed, updated_at=timezone.now())
+
+    try:
+        with open(partial_path, 'wb') as fh, timed(f"export_{job.kind}"), _heartbeat(job):
+            _builder(job.kind)(fh, progress=progress)
+        os.replace(partial_path, final_path)
+    except Exception as e:
+        logger.error(f"Export job {job.pk} failed: {str(e)}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(e), finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        return
+
+    now = timezone.now()
+    ExportJob.objects.filter(pk=job.pk).update(
+        status='done',
+        artifact=job.artifact,
+        size=os.path.getsize(final_path),
+        processed=total,
+        error='',
+        finished_at=now,
+        updated_at=now,
+    )
+    _expire_older(job)
+
+
+def process_export_jobs() -> int:
+    """Run queued export jobs until none are left; returns how many ran."""
+    ran = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return ran
+        logger.info(f"Building {job.kind} export {job.pk}")
+        run_job(job)
+        ran += 1
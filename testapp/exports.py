@@ -0,0 +1,199 @@
+# exports.py
+import os
+import zipfile
+
+from django.conf import settings
+from openpyxl import Workbook
+from openpyxl.drawing.image import Image as ExcelImage
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import SheetFormatProperties
+
+from .models import Participant
+from .thumbnails import thumbnail_path
+
+FIELDS = [
+    "username", "email", "phone_number", "designation", "user_image",
+    "qr_code", "qr_code_data", "qr_delivered", "qr_verified",
+    "registered_by", "verified_by", "verified_at", "created_at", "updated_at"
+]
+
+HEADERS = ["Username", "Email", "Phone Number", "Designation", "User Image",
+           "QR Code", "QR Code Data", "QR Delivered", "QR Verified",
+           "Registered By", "Verified By", "Verified At", "Created At", "Updated At"]
+
+COLUMN_WIDTHS = [20, 30, 15, 20, 15, 15, 20, 10, 10, 20, 20, 20, 20, 20]
+
+IMAGE_SIZE = 50  # Photo size in the sheet; also the row height
+
+
+def _naive(value):
+    return value.replace(tzinfo=None) if value else ""
+
+
+def write_participants_workbook(target, chunk_size: int = None, progress=None) -> int:
+    """
+    Stream the participants sheet (with photos) served by the export/ API into `target`.
+
+    The workbook is write-only: each row goes straight to disk and photos are
+    only read while the file is saved, so memory does not grow with the
+    number of participants. Photos are embedded as THUMBNAIL_SIZE thumbnails
+    (generated here for any that are missing), not as the uploaded originals.
+
+    Args:
+        target: Path or binary file to write the XLSX to
+        chunk_size: Participants fetched per query (EXPORT_CHUNK_SIZE)
+        progress: Optional callable receiving the number of rows written so far
+
+    Returns:
+        Number of participant rows written
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Participants")
+
+    # Column and row styles must be set before the first row is written;
+    # a sheet-wide row height avoids keeping a dimension object per row
+    for i, width in enumerate(COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    ws.sheet_format = SheetFormatProperties(defaultRowHeight=IMAGE_SIZE, customHeight=True)
+
+    ws.append(HEADERS)
+
+    participants = Participant.objects.order_by('id').values(*FIELDS).iterator(chunk_size=chunk_size)
+
+    rows = 0
+    for idx, participant in enumerate(participants, start=2):  # Start from row 2
+        ws.append([
+            participant["username"],
+            participant["email"],
+            participant["phone_number"],
+            participant["designation"],
+            "",  # Placeholder for user image
+            "",  # Placeholder for QR code
+            participant["qr_code_data"],
+            participant["qr_delivered"],
+            participant["qr_verified"],
+            participant["registered_by"] or "N/A",
+            participant["verified_by"] or "N/A",
+            _naive(participant["verified_at"]),
+            _naive(participant["created_at"]),
+            _naive(participant["updated_at"]),
+        ])
+        rows += 1
+
+        # Insert the user image's thumbnail rather than the full-size photo
+        image_path = thumbnail_path(participant["user_image"])
+        if image_path:
+            img = ExcelImage(image_path)
+            img.width, img.height = IMAGE_SIZE, IMAGE_SIZE
+            img.anchor = f"E{idx}"  # Insert into column E
+            ws.add_image(img)
+
+        if progress and rows % chunk_size == 0:
+            progress(rows)
+
+    wb.save(target)
+    return rows
+
+
+# Photos are already compressed; deflating them again costs CPU and saves nothing
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+
+ZIP_READ_SIZE = 64 * 1024  # Bytes of a photo read (and streamed) at a time
+
+
+class _ZipStream:
+    """Write-only file collecting what zipfile writes until the streaming generator takes it."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _add_images(zip_file: zipfile.ZipFile, chunk_size: int, progress=None):
+    """
+    Add every participant photo to `zip_file`, one read block at a time.
+
+    Yields the number of images added so far after each block, so a
+    streaming caller can pass on what has been written in between. A photo
+    shared by several participants (the default one) is added once. Photos
+    go in as user_images/<file name>; one whose file name is already taken
+    by a photo from another directory keeps its media path instead.
+    """
+    media_root = settings.MEDIA_ROOT  # Base directory for media files
+    images = handled = 0
+    added = set()  # stored paths already in the archive
+    arcnames = set()
+
+    participants = Participant.objects.order_by('id').values_list('user_image', flat=True)
+    for user_image in participants.iterator(chunk_size=chunk_size):
+        handled += 1
+        if progress and handled % chunk_size == 0:
+            progress(handled)
+        if not user_image:
+            continue
+        user_image_path = os.path.join(media_root, user_image)
+        if user_image in added or not os.path.exists(user_image_path):
+            continue
+        arcname = f"user_images/{os.path.basename(user_image_path)}"
+        if arcname in arcnames:
+            arcname = f"user_images/{user_image}"
+
+        info = zipfile.ZipInfo.from_file(user_image_path, arcname)
+        stored = os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS
+        info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+        with open(user_image_path, 'rb') as source, zip_file.open(info, 'w') as dest:
+            while block := source.read(ZIP_READ_SIZE):
+                dest.write(block)
+                yield images
+        added.add(user_image)
+        arcnames.add(arcname)
+        images += 1
+        yield images
+
+
+def write_images_zip(target, chunk_size: int = None, progress=None) -> int:
+    """
+    Write every participant photo into a ZIP archive (the export job's photo archive).
+
+    Args:
+        target: Path or binary file to write the archive to
+        chunk_size: Participants fetched per query (EXPORT_CHUNK_SIZE)
+        progress: Optional callable receiving the number of participants handled so far
+
+    Returns:
+        Number of images added
+    """
+    images = 0
+    with zipfile.ZipFile(target, "w") as zip_file:
+        for images in _add_images(zip_file, chunk_size or settings.EXPORT_CHUNK_SIZE, progress):
+            pass
+    return images
+
+
+def stream_images_zip(chunk_size: int = None):
+    """
+    Generate the photo archive as it is written, for the download/ API.
+
+    Only one read block of a photo is held at a time, so memory stays flat
+    however many participants there are.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, "w") as zip_file:
+        for _ in _add_images(zip_file, chunk_size or settings.EXPORT_CHUNK_SIZE):
+            data = stream.take()
+            if data:
+                yield data
+    yield stream.take()  # Central directory, written on close
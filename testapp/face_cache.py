@@ -0,0 +1,106 @@
+# face_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+
+def dhash(image, size: int = 8) -> int:
+    """64-bit difference hash; near-identical frames differ in only a few bits."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def client_key(request) -> str:
+    """Identify a gate camera: the id its page sends, else the client address."""
+    camera = request.POST.get('camera')
+    if camera:
+        return f"camera:{camera[:64]}"
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class FaceResultCache:
+    """
+    Short-lived per-camera cache of recognition results.
+
+    Each camera keeps its most recent results keyed by the perceptual hash
+    of the face crop; a frame whose hash is within `max_distance` bits of a
+    live entry reuses that result instead of running inference. Both the
+    entries of a camera and the cameras themselves are evicted LRU.
+    """
+
+    def __init__(self, ttl: float, max_distance: int, per_client: int, max_clients: int):
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.per_client = per_client
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, client: str, key: int):
+        """Return (True, result) for a near-duplicate hit, else (False, None)."""
+        if self.ttl <= 0:
+            return False, None
+        now = time.monotonic()
+        with self._lock:
+            entries = self._clients.get(client)
+            if entries is not None:
+                self._clients.move_to_end(client)
+                for stored_key in list(entries):
+                    expires_at, result = entries[stored_key]
+                    if expires_at <= now:
+                        del entries[stored_key]
+                        self.expirations += 1
+                    elif bin(stored_key ^ key).count('1') <= self.max_distance:
+                        entries.move_to_end(stored_key)
+                        self.hits += 1
+                        return True, result
+            self.misses += 1
+            return False, None
+
+    def set(self, client: str, key: int, result) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            entries = self._clients.get(client)
+            if entries is None:
+                entries = self._clients[client] = OrderedDict()
+                if len(self._clients) > self.max_clients:
+                    _, dropped = self._clients.popitem(last=False)
+                    self.evictions += len(dropped)
+            self._clients.move_to_end(client)
+            entries[key] = (time.monotonic() + self.ttl, result)
+            entries.move_to_end(key)
+            if len(entries) > self.per_client:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'clients': len(self._clients),
+                'entries': sum(len(entries) for entries in self._clients.values()),
+            }
+
+
+result_cache = FaceResultCache(
+    ttl=settings.FACE_CACHE_TTL,
+    max_distance=settings.FACE_CACHE_MAX_DISTANCE,
+    per_client=settings.FACE_CACHE_PER_CLIENT,
+    max_clients=settings.FACE_CACHE_MAX_CLIENTS,
+)
@@ -0,0 +1,360 @@
+# face_index.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from SampleQR.cache import TieredCache
+from SampleQR.metrics import timed
+
+from . import face_worker
+from .face_search import get_search_backend
+from .models import Participant, FaceEmbedding
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE = 'default/default_profile.jpg'
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length so a dot product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class FaceIndex:
+    """
+    Process-resident face embedding index.
+
+    Holds one L2-normalised row per Participant; lookups go through the
+    search backend chosen by FACE_SEARCH_BACKEND (see face_search.py).
+    Updates swap the arrays in one assignment, so concurrent searches
+    always see a consistent snapshot.
+    """
+
+    def __init__(self, ids=None, labels=None, vectors=None, backend=None):
+        self.backend = backend or get_search_backend()
+        ids = np.asarray(ids if ids is not None else [], dtype=np.int64)
+        labels = list(labels if labels is not None else [])
+        if vectors is None or len(ids) == 0:
+            vectors = np.empty((0, 0), dtype=np.float32)
+        else:
+            vectors = l2_normalize(vectors)
+        self._data = (ids, labels, vectors, self.backend.build(vectors))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data[0])
+
+    @property
+    def ids(self):
+        return self._data[0]
+
+    def search(self, embeddings, threshold: float):
+        """
+        Match query embeddings against the index.
+
+        Args:
+            embeddings: Sequence of query vectors (one per detected face)
+            threshold: Maximum cosine distance accepted as a match
+
+        Returns:
+            List with a (participant_id, label, distance) tuple or None per query
+        """
+        ids, labels, _, searcher = self._data
+        if not len(embeddings):
+            return []
+        if not len(ids):
+            return [None] * len(embeddings)
+
+        with timed('face_search'):
+            rows, scores = searcher.search(l2_normalize(np.atleast_2d(embeddings)))
+
+        results = []
+        for row, score in zip(rows, scores):
+            distance = float(1.0 - score)
+            if distance > threshold:
+                results.append(None)
+            else:
+                results.append((int(ids[row]), labels[row], distance))
+        return results
+
+    def _refit(self, searcher, vectors, changed_rows):
+        if isinstance(searcher, self.backend):
+            return searcher.updated(vectors, changed_rows)
+        return self.backend.build(vectors)
+
+    def upsert(self, entries) -> None:
+        """Add or replace (participant_id, label, vector) entries."""
+        entries = list(entries)
+        if not entries:
+            return
+        with self._lock:
+            ids, labels, vectors, searcher = self._data
+            ids, labels = ids.copy(), list(labels)
+            positions = {int(pk): row for row, pk in enumerate(ids)}
+            new_ids, new_labels, new_vectors = [], [], []
+            replaced = {}
+
+            for pk, label, vector in entries:
+                pk = int(pk)
+                vector = l2_normalize(vector)
+                if pk in positions:
+                    replaced[positions[pk]] = vector
+                    labels[positions[pk]] = label
+                else:
+                    positions[pk] = len(ids) + len(new_ids)
+                    new_ids.append(pk)
+                    new_labels.append(label)
+                    new_vectors.append(vector)
+
+            if replaced:
+                vectors = vectors.copy()
+                for row, vector in replaced.items():
+                    vectors[row] = vector
+            if new_ids:
+                ids = np.concatenate([ids, np.asarray(new_ids, dtype=np.int64)])
+                labels.extend(new_labels)
+                stacked = np.vstack(new_vectors)
+                vectors = stacked if vectors.size == 0 else np.vstack([vectors, stacked])
+
+            changed_rows = list(replaced) + list(range(len(ids) - len(new_ids), len(ids)))
+            self._data = (ids, labels, vectors, self._refit(searcher, vectors, changed_rows))
+
+    def remove(self, participant_ids) -> None:
+        """Drop the rows of the given participants, if present."""
+        with self._lock:
+            ids, labels, vectors, searcher = self._data
+            keep = ~np.isin(ids, np.asarray(list(participant_ids), dtype=np.int64))
+            if keep.all():
+                return
+            vectors = vectors[keep] if vectors.size else vectors
+            if isinstance(searcher, self.backend):
+                searcher = searcher.subset(vectors, keep)
+            else:
+                searcher = self.backend.build(vectors)
+            self._data = (
+                ids[keep],
+                [label for label, kept in zip(labels, keep) if kept],
+                vectors,
+                searcher,
+            )
+
+
+def vector_from_bytes(data) -> np.ndarray:
+    return np.frombuffer(bytes(data), dtype=np.float32)
+
+
+def compute_embedding(image_path: str):
+    """Embed the most prominent face of a stored participant photo."""
+    faces = face_worker.represent(image_path, max_faces=1)
+    if not faces:
+        return None
+    return faces[0]['embedding']
+
+
+def label_for_image(image_name: str) -> str:
+    """Display name returned to the gate page (the photo filename without extension)."""
+    name_without_extension, _ = os.path.splitext(os.path.basename(image_name))
+    return name_without_extension
+
+
+def has_face_image(participant: Participant) -> bool:
+    return bool(participant.user_image) and participant.user_image.name != DEFAULT_IMAGE
+
+
+def store_embedding(participant: Participant, force: bool = False):
+    """
+    Compute and persist the embedding of one participant.
+
+    Skips the model entirely when the stored vector was already computed
+    from the same photo with the same model, unless `force` is set.
+
+    Returns:
+        The stored FaceEmbedding, or None if the participant has no usable face
+    """
+    model_name = settings.FACE_MODEL_NAME
+
+    if not has_face_image(participant):
+        stale = FaceEmbedding.objects.filter(participant_id=participant.pk)
+        if stale.exists():  # most participants never had a photo; keep this path read-only
+            stale.delete()
+        return None
+
+    image_name = participant.user_image.name
+    if not force:
+        existing = FaceEmbedding.objects.filter(
+            participant_id=participant.pk, model_name=model_name, source_image=image_name
+        ).first()
+        if existing is not None:
+            return existing
+
+    image_path = participant.user_image.path
+    embedding = compute_embedding(image_path) if os.path.exists(image_path) else None
+    if embedding is None:
+        FaceEmbedding.objects.filter(participant_id=participant.pk).delete()
+        return None
+
+    face_embedding, _ = FaceEmbedding.objects.update_or_create(
+        participant_id=participant.pk,
+        defaults={
+            'model_name': model_name,
+            'source_image': image_name,
+            'vector': np.asarray(embedding, dtype=np.float32).tobytes(),
+        }
+    )
+    return face_embedding
+
+
+def update_participant_embedding(participant_id: int) -> None:
+    """Bring the stored and in-memory vector of one participant up to date."""
+    participant = Participant.objects.only('id', 'user_image').filter(pk=participant_id).first()
+    if participant is None:
+        discard_participant(participant_id)
+        return
+
+    face_embedding = store_embedding(participant)
+    if face_embedding is None:
+        discard_participant(participant_id)
+    elif _index is not None:
+        _index.upsert([(
+            participant_id,
+            label_for_image(face_embedding.source_image),
+            vector_from_bytes(face_embedding.vector),
+        )])
+
+
+# A single background thread keeps embedding work off the request thread.
+_embedding_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='face-embed')
+
+
+def _run_embedding_update(participant_id: int) -> None:
+    try:
+        update_participant_embedding(participant_id)
+    except Exception as e:
+        logger.error(f"Face embedding update failed for participant {participant_id}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def schedule_embedding_update(participant_id: int) -> None:
+    _embedding_executor.submit(_run_embedding_update, participant_id)
+
+
+def discard_participant(participant_id: int) -> None:
+    if _index is not None:
+        _index.remove([participant_id])
+
+
+_index = None
+_index_lock = threading.Lock()
+_sync_state = {'checked_at': 0.0, 'synced_at': None, 'count': None, 'updated_at': None, 'version': None}
+
+shared_index = TieredCache('face_index')
+
+
+def announce_index_change() -> None:
+    """Tell every worker the embedding store changed (after commit)."""
+    shared_index.bump('embeddings')
+
+
+def _index_version():
+    return shared_index.version('embeddings') if shared_index.is_shared else None
+
+
+def _embedding_rows(queryset):
+    for pk, image_name, vector in queryset.values_list('participant_id', 'source_image', 'vector').iterator():
+        yield pk, label_for_image(image_name), vector_from_bytes(vector)
+
+
+def _load_index() -> FaceIndex:
+    version = _index_version()
+    synced_at = timezone.now()
+    rows = FaceEmbedding.objects.filter(model_name=settings.FACE_MODEL_NAME)
+    signature = rows.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    entries = list(_embedding_rows(rows))
+    index = FaceIndex(
+        [pk for pk, _, _ in entries],
+        [label for _, label, _ in entries],
+        np.vstack([vector for _, _, vector in entries]) if entries else None,
+    )
+    _sync_state.update(checked_at=time.monotonic(), synced_at=synced_at, version=version, **signature)
+    logger.info(f"Loaded face index with {len(index)} participants")
+    return index
+
+
+def _sync_index(index: FaceIndex) -> None:
+    """
+    Pull changes other workers made to the embedding store.
+
+    Only rows touched since the last sync are fetched; a count mismatch
+    afterwards means rows were deleted, so the id list is reconciled. With a
+    shared cache the store is not even queried until a change was announced.
+
+    updated_at is stamped before commit, so a write can become visible after
+    one with a later stamp. Each sync therefore re-reads the last
+    FACE_INDEX_SYNC_OVERLAP_SECONDS of changes, and an unchanged signature is
+    only trusted once a sync has run that long after the newest change.
+    """
+    version = _index_version()
+    if version is not None and version == _sync_state['version']:
+        return
+    _sync_state['version'] = version  # read before syncing, so a later announcement is not missed
+
+    overlap = timedelta(seconds=settings.FACE_INDEX_SYNC_OVERLAP_SECONDS)
+    synced_at = timezone.now()
+    rows = FaceEmbedding.objects.filter(model_name=settings.FACE_MODEL_NAME)
+    signature = rows.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    last_updated_at = _sync_state['updated_at']
+    settled = last_updated_at is None or _sync_state['synced_at'] >= last_updated_at + overlap
+    if (
+        version is None and settled
+        and signature['count'] == _sync_state['count'] and signature['updated_at'] == last_updated_at
+    ):
+        return
+
+    if last_updated_at is not None:
+        changed = rows.filter(updated_at__gte=last_updated_at - overlap)
+    else:
+        changed = rows
+    index.upsert(_embedding_rows(changed))
+
+    if len(index) != signature['count']:
+        stored_ids = set(rows.values_list('participant_id', flat=True))
+        index.remove([pk for pk in index.ids.tolist() if pk not in stored_ids])
+
+    _sync_state.update(synced_at=synced_at, **signature)
+
+
+def get_face_index() -> FaceIndex:
+    """
+    Return the index for this worker, loading it once per process.
+
+    Afterwards the embedding store is polled at most every
+    FACE_INDEX_SYNC_SECONDS and only the changed rows are applied.
+    """
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _load_index()
+        return _index
+
+    now = time.monotonic()
+    if now - _sync_state['checked_at'] >= settings.FACE_INDEX_SYNC_SECONDS:
+        with _index_lock:
+            if now - _sync_state['checked_at'] >= settings.FACE_INDEX_SYNC_SECONDS:
+                _sync_state['checked_at'] = now
+                _sync_index(_index)
+    return _index
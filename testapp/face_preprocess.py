@@ -0,0 +1,104 @@
+# face_preprocess.py
+import json
+import logging
+from io import BytesIO
+
+import cv2
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# cv2 can decode JPEGs directly at 1/2, 1/4 or 1/8 resolution (DCT scaling),
+# which is far cheaper than a full decode followed by a resize.
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def decode_frame(data: bytes, max_side: int = None):
+    """
+    Decode a camera frame no larger than `max_side` pixels on its long edge.
+
+    Returns:
+        Tuple of (BGR image, scale) where scale maps original frame
+        coordinates to decoded ones (decoded = original * scale)
+    """
+    max_side = max_side or settings.FACE_MAX_FRAME_SIDE
+    try:
+        width, height = Image.open(BytesIO(data)).size  # reads the header only
+    except Exception:
+        raise ValueError("Unreadable image")
+
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+        if max(width, height) / factor >= max_side:
+            flag = reduced_flag
+            break
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if image is None:
+        raise ValueError("Unreadable image")
+
+    long_side = max(image.shape[:2])
+    if long_side > max_side:
+        ratio = max_side / long_side
+        image = cv2.resize(image, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+
+    return image, image.shape[1] / width
+
+
+def parse_boxes(raw: str, width: int, height: int):
+    """
+    Parse face boxes detected by face-api.js on the gate page.
+
+    Args:
+        raw: JSON list of {"x", "y", "width", "height"} in original frame pixels
+        width, height: Original frame size, used to clip the boxes
+
+    Returns:
+        List of (x, y, w, h) integer tuples; invalid entries are dropped
+    """
+    if not raw:
+        return []
+    try:
+        items = json.loads(raw)
+    except ValueError:
+        logger.warning("Ignoring malformed face boxes")
+        return []
+
+    boxes = []
+    for item in items[:settings.FACE_MAX_CLIENT_BOXES] if isinstance(items, list) else []:
+        try:
+            x, y = float(item['x']), float(item['y'])
+            w, h = float(item['width']), float(item['height'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+        if x1 - x0 >= 8 and y1 - y0 >= 8:
+            boxes.append((x0, y0, x1 - x0, y1 - y0))
+    return boxes
+
+
+def crop_faces(image, boxes, scale: float, margin: float = None):
+    """
+    Cut each box (in original frame pixels) out of the decoded frame.
+
+    A margin around the box keeps the chin and forehead that face-api.js
+    tends to clip, which the recognition model expects to see.
+    """
+    margin = settings.FACE_CROP_MARGIN if margin is None else margin
+    frame_h, frame_w = image.shape[:2]
+    crops = []
+    for x, y, w, h in boxes:
+        pad_w, pad_h = w * margin, h * margin
+        x0 = max(0, int((x - pad_w) * scale))
+        y0 = max(0, int((y - pad_h) * scale))
+        x1 = min(frame_w, int((x + w + pad_w) * scale))
+        y1 = min(frame_h, int((y + h + pad_h) * scale))
+        crops.append(np.ascontiguousarray(image[y0:y1, x0:x1]))
+    return crops
@@ -0,0 +1,145 @@
+# face_search.py
+import logging
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExactSearch:
+    """Brute-force cosine search: one matrix product over every stored vector."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, vectors: np.ndarray) -> 'ExactSearch':
+        return cls(vectors)
+
+    def updated(self, vectors: np.ndarray, changed_rows) -> 'ExactSearch':
+        return ExactSearch(vectors)
+
+    def subset(self, vectors: np.ndarray, keep: np.ndarray) -> 'ExactSearch':
+        return ExactSearch(vectors)
+
+    def search(self, queries: np.ndarray):
+        """
+        Args:
+            queries: (q, d) matrix of L2-normalised query vectors
+
+        Returns:
+            Tuple of (best row per query, cosine similarity of that row)
+        """
+        scores = queries @ self.vectors.T
+        rows = scores.argmax(axis=1)
+        return rows, scores[np.arange(len(rows)), rows]
+
+
+class IVFSearch:
+    """
+    Inverted-file approximate search in pure NumPy.
+
+    Vectors are clustered with spherical k-means; a query is only scored
+    against the members of its `n_probe` closest clusters. Incremental
+    updates re-assign just the changed rows, and the centroids are
+    retrained once the collection has grown well past the trained size.
+    """
+
+    MIN_TRAIN_SIZE = 1024  # below this an exact scan is already cheap
+    RETRAIN_GROWTH = 4
+    TRAIN_ITERATIONS = 10
+
+    def __init__(self, vectors, centroids, assignments, trained_size, n_probe):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_size = trained_size
+        self.n_probe = n_probe
+        self.order = np.argsort(assignments, kind='stable')
+        self.offsets = np.searchsorted(assignments[self.order], np.arange(len(centroids) + 1))
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: int = None, n_probe: int = None, seed: int = 0):
+        n_probe = n_probe or settings.FACE_IVF_NPROBE
+        if len(vectors) < cls.MIN_TRAIN_SIZE:
+            return ExactSearch(vectors)
+
+        n_lists = n_lists or settings.FACE_IVF_LISTS or int(np.sqrt(len(vectors)))
+        centroids = cls.train(vectors, n_lists, seed)
+        assignments = cls.assign(vectors, centroids)
+        logger.info(f"Trained IVF face search with {n_lists} lists over {len(vectors)} vectors")
+        return cls(vectors, centroids, assignments, len(vectors), n_probe)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), n_lists * 64)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(cls.TRAIN_ITERATIONS):
+            labels = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Reseed empty clusters so every list stays useful
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        return centroids
+
+    @staticmethod
+    def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 8192):
+            chunk = vectors[start:start + 8192]
+            assignments[start:start + 8192] = (chunk @ centroids.T).argmax(axis=1)
+        return assignments
+
+    def updated(self, vectors: np.ndarray, changed_rows):
+        if len(vectors) > self.trained_size * self.RETRAIN_GROWTH:
+            return IVFSearch.build(vectors, n_lists=int(np.sqrt(len(vectors))), n_probe=self.n_probe)
+
+        changed_rows = np.asarray(list(changed_rows), dtype=np.int64)
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        assignments[:len(self.assignments)] = self.assignments
+        if len(changed_rows):
+            assignments[changed_rows] = self.assign(vectors[changed_rows], self.centroids)
+        return IVFSearch(vectors, self.centroids, assignments, self.trained_size, self.n_probe)
+
+    def subset(self, vectors: np.ndarray, keep: np.ndarray):
+        return IVFSearch(vectors, self.centroids, self.assignments[keep], self.trained_size, self.n_probe)
+
+    def search(self, queries: np.ndarray):
+        n_probe = min(self.n_probe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+
+        rows = np.zeros(len(queries), dtype=np.int64)
+        best = np.full(len(queries), -np.inf, dtype=np.float32)
+        for i, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([
+                self.order[self.offsets[lst]:self.offsets[lst + 1]] for lst in lists
+            ])
+            if not len(candidates):
+                continue
+            scores = self.vectors[candidates] @ query
+            top = int(scores.argmax())
+            rows[i], best[i] = candidates[top], scores[top]
+        return rows, best
+
+
+SEARCH_BACKENDS = {
+    'exact': ExactSearch,
+    'ivf': IVFSearch,
+}
+
+
+def get_search_backend():
+    """Search class selected by settings.FACE_SEARCH_BACKEND."""
+    try:
+        return SEARCH_BACKENDS[settings.FACE_SEARCH_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown FACE_SEARCH_BACKEND: {settings.FACE_SEARCH_BACKEND}")
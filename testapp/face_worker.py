@@ -0,0 +1,337 @@
+# face_worker.py
+"""
+Face inference outside the gunicorn workers.
+
+`manage.py run_face_worker` starts a small daemon that owns a process pool;
+each pool process loads the recognition model once. Web workers talk to it
+over a Unix socket (FACE_WORKER_SOCKET) and only wait for the result, so
+TensorFlow never lives inside a gunicorn worker. Concurrent frames are
+micro-batched into a single forward pass (FACE_BATCH_MAX_SIZE /
+FACE_BATCH_MAX_WAIT_MS). With no socket configured
+(local development) inference runs in-process instead.
+"""
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import Client, Listener
+
+from django.conf import settings
+
+from SampleQR.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class FaceWorkerError(Exception):
+    """The face worker could not be reached or did not answer in time."""
+
+
+def _authkey() -> bytes:
+    return hashlib.sha256(f"face-worker{settings.SECRET_KEY}".encode()).digest()
+
+
+# ---------------------------------------------------------------------------
+# Inference (runs inside the pool processes, or in-process without a socket)
+
+def _load_model():
+    """
+    Pool initializer: load the model and push one blank frame through the
+    detector and the network, so a process's first real batch does not pay
+    for detector set-up and graph tracing.
+    """
+    import numpy as np
+    from deepface import DeepFace
+
+    DeepFace.build_model(settings.FACE_MODEL_NAME)
+    try:
+        _represent_batch([(np.zeros((224, 224, 3), dtype=np.uint8), 1, None)])
+    except Exception as e:
+        logger.warning(f"Face worker warm-up failed: {str(e)}")
+
+
+def _pool_started():
+    """Submitted once per new pool so its processes start (and warm up) before the first frame."""
+
+
+def _decode(image):
+    if not isinstance(image, bytes):
+        return image  # file path or an already decoded BGR array
+    import cv2
+    import numpy as np
+    return cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR)
+
+
+def _forward(model, batch):
+    """One forward pass for a stack of pre-processed faces."""
+    import numpy as np
+
+    try:
+        return np.asarray(model.model(batch, training=False), dtype=np.float32)
+    except Exception:
+        # Models that are not plain Keras graphs (e.g. SFace) only embed one face at a time
+        return np.asarray([model.forward(face[None, ...]) for face in batch], dtype=np.float32)
+
+
+def _represent_batch(items):
+    """
+    Detect faces in several frames and embed all of them in one forward pass.
+
+    Mirrors deepface.modules.representation.represent, except that the
+    model runs once over every face of every frame in the batch.
+
+    Args:
+        items: List of (image, max_faces, detector_backend) tuples
+
+    Returns:
+        One entry per item: the list of faces, or the exception that item raised
+    """
+    import numpy as np
+    from deepface.modules import detection, modeling, preprocessing
+
+    model = modeling.build_model(task="facial_recognition", model_name=settings.FACE_MODEL_NAME)
+    target_size = model.input_shape
+
+    results, crops = [], []
+    for image, max_faces, detector_backend in items:
+        try:
+            img_objs = detection.extract_faces(
+                img_path=_decode(image),
+                detector_backend=detector_backend or settings.FACE_DETECTOR_BACKEND,
+                grayscale=False,
+                enforce_detection=False,
+                align=True,
+            )
+        except Exception as e:
+            results.append(e)
+            continue
+
+        if max_faces is not None and max_faces < len(img_objs):
+            img_objs = sorted(
+                img_objs,
+                key=lambda img_obj: img_obj["facial_area"]["w"] * img_obj["facial_area"]["h"],
+                reverse=True,
+            )[:max_faces]
+
+        faces = []
+        for img_obj in img_objs:
+            face = preprocessing.resize_image(
+                img=img_obj["face"][:, :, ::-1],  # rgb to bgr
+                target_size=(target_size[1], target_size[0]),
+            )
+            crops.append(preprocessing.normalize_input(img=face, normalization="base"))
+            faces.append({
+                'embedding': None,
+                'facial_area': img_obj["facial_area"],
+                'face_confidence': img_obj["confidence"],
+            })
+        results.append(faces)
+
+    if crops:
+        embeddings = iter(_forward(model, np.concatenate(crops)))
+        for faces in results:
+            if isinstance(faces, Exception):
+                continue
+            for face in faces:
+                face['embedding'] = next(embeddings)
+    return results
+
+
+def _represent_many(images, max_faces=None, detector_backend=None):
+    """Detect and embed faces in image paths, encoded bytes or BGR arrays."""
+    results = _represent_batch([(image, max_faces, detector_backend) for image in images])
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
+
+
+OPERATIONS = {
+    'represent_many': _represent_many,
+}
+
+
+# ---------------------------------------------------------------------------
+# Daemon
+
+class FrameBatcher:
+    """
+    Micro-batches concurrent represent() requests.
+
+    Frames wait at most `max_wait` seconds (or until `max_size` frames are
+    queued) and are then embedded by one pool process in a single forward
+    pass. At most one batch per pool process is in flight, so frames that
+    arrive while every process is busy simply join the next, larger batch.
+    """
+
+    def __init__(self, server, max_size: int, max_wait: float):
+        self.server = server
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.slots = threading.BoundedSemaphore(server.processes)
+        threading.Thread(target=self._loop, name='face-batcher', daemon=True).start()
+
+    def submit(self, image, max_faces=None, detector_backend=None) -> Future:
+        future = Future()
+        self.queue.put(((image, max_faces, detector_backend), future))
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            self.slots.acquire()
+            batch = self._collect()
+            try:
+                pool_future = self.server.pool.submit(_represent_batch, [item for item, _ in batch])
+            except Exception as e:
+                self._finish(batch, e)
+                continue
+            pool_future.add_done_callback(lambda done, batch=batch: self._fan_out(batch, done))
+
+    def _fan_out(self, batch, pool_future):
+        try:
+            results = pool_future.result()
+        except Exception as e:
+            self._finish(batch, e)
+            return
+        self.slots.release()
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _finish(self, batch, error):
+        if isinstance(error, BrokenProcessPool):
+            self.server.restart_pool()
+        self.slots.release()
+        for _, future in batch:
+            future.set_exception(error)
+
+
+class FaceWorkerServer:
+    """Accepts socket connections and feeds their frames to the batcher."""
+
+    def __init__(self, address: str, processes: int, batch_size: int = None, batch_wait_ms: int = None):
+        self.address = address
+        self.processes = processes
+        self.pool = self._make_pool()
+        self._pool_lock = threading.Lock()
+        self.batcher = FrameBatcher(
+            self,
+            max_size=batch_size or settings.FACE_BATCH_MAX_SIZE,
+            max_wait=(batch_wait_ms if batch_wait_ms is not None else settings.FACE_BATCH_MAX_WAIT_MS) / 1000,
+        )
+
+    def _make_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_load_model)
+        pool.submit(_pool_started)  # with fork, the first submit spawns every process
+        return pool
+
+    def restart_pool(self):
+        with self._pool_lock:
+            logger.error("Face worker pool broke, restarting it")
+            self.pool = self._make_pool()
+
+    def run(self, operation: str, *args):
+        if operation == 'represent_many':
+            images, max_faces, detector_backend = args
+            futures = [self.batcher.submit(image, max_faces, detector_backend) for image in images]
+            return [future.result() for future in futures]
+        return self.pool.submit(OPERATIONS[operation], *args).result()
+
+    def handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    operation, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(('ok', self.run(operation, *args)))
+                except Exception as e:
+                    logger.error(f"Face worker {operation} failed: {str(e)}")
+                    conn.send(('error', str(e)))
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        with Listener(self.address, family='AF_UNIX', authkey=_authkey()) as listener:
+            logger.info(f"Face worker listening on {self.address} with {self.processes} processes")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected face worker connection: {str(e)}")
+                    continue
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+
+# ---------------------------------------------------------------------------
+# Client (runs in the web workers)
+
+_connections = threading.local()
+
+
+def _call(operation: str, *args):
+    address = settings.FACE_WORKER_SOCKET
+    if not address:
+        return OPERATIONS[operation](*args)
+
+    conn = getattr(_connections, 'conn', None)
+    try:
+        if conn is None:
+            conn = _connections.conn = Client(address, family='AF_UNIX', authkey=_authkey())
+        conn.send((operation, args))
+        if not conn.poll(settings.FACE_WORKER_TIMEOUT):
+            raise TimeoutError(f"no answer within {settings.FACE_WORKER_TIMEOUT}s")
+        status, result = conn.recv()
+    except Exception as e:
+        # A late reply would desynchronise the connection, so always start afresh
+        if conn is not None:
+            conn.close()
+        _connections.conn = None
+        raise FaceWorkerError(f"Face worker {operation} failed: {str(e)}") from e
+
+    if status != 'ok':
+        raise FaceWorkerError(result)
+    return result
+
+
+def represent_many(images, max_faces=None, detector_backend=None):
+    """
+    Detect and embed faces in several images through the worker pool.
+
+    Args:
+        images: Encoded image bytes, file paths or decoded BGR arrays
+        max_faces: Keep only the largest N faces per image
+        detector_backend: Override FACE_DETECTOR_BACKEND ('skip' for pre-cropped faces)
+
+    Returns:
+        Per image, a list of dicts with 'embedding' (float32 array),
+        'facial_area' and 'face_confidence'
+    """
+    if not images:
+        return []
+    with timed('face_embed'):
+        return _call('represent_many', list(images), max_faces, detector_backend)
+
+
+def represent(image, max_faces=None, detector_backend=None):
+    """Detect and embed the faces of a single image (see represent_many)."""
+    return represent_many([image], max_faces, detector_backend)[0]
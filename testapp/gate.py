@@ -0,0 +1,76 @@
+# gate.py
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.crypto import salted_hmac
+
+from .models import Participant
+
+BUNDLE_FORMAT = 1
+
+# Rows committed after a later-stamped row (concurrent transactions) still reach the next delta
+DELTA_LOOKBACK = timedelta(seconds=60)
+
+
+def token_digest(token: str) -> str:
+    """
+    Truncated sha256 of a QR token, as stored in the bundle.
+
+    Scanners hash what they read the same way, so a leaked bundle holds no
+    usable tokens.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()[:settings.GATE_BUNDLE_DIGEST_CHARS]
+
+
+def bundle_key() -> bytes:
+    """HMAC key shared with the scanner devices (GATE_BUNDLE_KEY, else derived from SECRET_KEY)."""
+    if settings.GATE_BUNDLE_KEY:
+        return settings.GATE_BUNDLE_KEY.encode()
+    return salted_hmac('testapp.gate.bundle_key', 'gate-bundle').hexdigest().encode()
+
+
+def sign(body: bytes) -> str:
+    return 'sha256=' + hmac.new(bundle_key(), body, hashlib.sha256).hexdigest()
+
+
+def build_bundle(since=None) -> bytes:
+    """
+    Serialise the verification bundle for offline scanners.
+
+    Args:
+        since: Version (a participant updated_at) of the bundle the device
+            already has; only participants changed since then are included
+
+    Returns:
+        Compact JSON. `entries` are [digest, participant id, username, checked_in];
+        `version` is passed back as `since` for the next delta. Deletions are
+        not carried by deltas, so devices compare `total` and take a full
+        bundle when it no longer matches.
+    """
+    participants = Participant.objects.order_by()
+    if since is not None:
+        participants = participants.filter(updated_at__gte=since - DELTA_LOOKBACK)
+
+    summary = Participant.objects.aggregate(version=Max('updated_at'))
+    entries = [
+        [token_digest(token), participant_id, username, checked_in]
+        for participant_id, token, username, checked_in in participants.values_list(
+            'id', 'qr_code_data', 'username', 'qr_verified'
+        ).iterator(chunk_size=5000)
+    ]
+    bundle = {
+        'format': BUNDLE_FORMAT,
+        'event': settings.EVENT_ID,
+        'full': since is None,
+        'since': since.isoformat() if since else None,
+        'version': summary['version'].isoformat() if summary['version'] else None,
+        'single_use': settings.QR_CODES_SINGLE_USE,
+        'digest_chars': settings.GATE_BUNDLE_DIGEST_CHARS,
+        'total': Participant.objects.count(),
+        'entries': entries,
+    }
+    return json.dumps(bundle, separators=(',', ':')).encode()
@@ -0,0 +1,41 @@
+# landing.py
+import hashlib
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from adminapp.models import Testimonial
+from SampleQR.cache import TieredCache
+
+landing_cache = TieredCache('landing')
+
+
+def render_landing_page(request) -> dict:
+    """
+    The landing page as served to every visitor, from the cache when possible.
+
+    The page holds nothing visitor-specific (the contact form's CSRF token is
+    read from the cookie by contact_form.js), so one rendering serves everyone
+    until a testimonial changes.
+
+    Returns:
+        Dict with 'body' (bytes), 'etag' and 'last_modified' (when it was rendered)
+    """
+    def build():
+        testimonials = Testimonial.objects.all()
+        body = render_to_string('index.html', {'testimonials': testimonials}, request=request).encode()
+        return {
+            'body': body,
+            # Content hash, so every worker hands out the same ETag for the same page
+            'etag': '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            'last_modified': timezone.now().replace(microsecond=0),
+        }
+
+    # One worker renders after an invalidation; the others wait for its copy
+    return landing_cache.get_or_build('page', build, settings.LANDING_PAGE_CACHE_TIMEOUT)
+
+
+def invalidate_landing_page() -> None:
+    """Drop the cached landing page; the next visitor renders it afresh."""
+    landing_cache.delete('page')
@@ -0,0 +1,99 @@
+# mailer.py
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from SampleQR.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(error: Exception) -> bool:
+    """True when the connection itself is gone, as opposed to a rejected message."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    # SMTPException subclasses OSError, so plain socket errors are told apart explicitly
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class PooledMailSender:
+    """
+    Sends many messages over one long-lived mail connection.
+
+    The SMTP+TLS handshake is paid once per connection instead of once per
+    message. A dropped connection is reopened and the message retried once;
+    the connection is also recycled after EMAIL_CONNECTION_MAX_MESSAGES
+    messages or EMAIL_CONNECTION_IDLE_TIMEOUT idle seconds.
+    """
+
+    def __init__(self, backend: str = None):
+        self.backend = backend
+        self.connection = None
+        self.sent_on_connection = 0
+        self.last_used = 0.0
+
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False)
+            self.connection.open()
+            self.sent_on_connection = 0
+        return self.connection
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.debug(f"Ignoring error while closing mail connection: {str(e)}")
+            self.connection = None
+
+    def close_if_idle(self) -> None:
+        if self.connection is not None and time.monotonic() - self.last_used > settings.EMAIL_CONNECTION_IDLE_TIMEOUT:
+            self.close()
+
+    @timed('smtp_send')
+    def send(self, message) -> None:
+        """Send one message, reconnecting once if the connection was dropped."""
+        for attempt in (1, 2):
+            try:
+                if not self.open().send_messages([message]):
+                    raise smtplib.SMTPException("Message was not accepted")
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                self.close()
+                if attempt == 2:
+                    raise
+                logger.info(f"Mail connection lost ({str(e)}), reconnecting")
+                continue
+
+            self.last_used = time.monotonic()
+            self.sent_on_connection += 1
+            if self.sent_on_connection >= settings.EMAIL_CONNECTION_MAX_MESSAGES:
+                self.close()
+            return
+
+    def send_batch(self, messages):
+        """
+        Send messages over the shared connection.
+
+        Returns:
+            One entry per message: None on success, else the exception raised
+        """
+        results = []
+        for message in messages:
+            try:
+                self.send(message)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
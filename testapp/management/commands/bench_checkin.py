@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from testapp.checkin import CHECKED_IN, check_in, token_cache
+from testapp.models import Participant, User
+from testapp.utils import new_qr_token
+
+BENCH_DESIGNATION = '__bench_checkin__'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure check-in throughput over distinct codes from concurrent gates. Creates and removes "
+        "its own participants in the configured database, so it only runs with --yes. "
+        "ConcurrentCheckInTests covers the race on a single code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codes', type=int, default=2000, help="Distinct codes to scan.")
+        parser.add_argument('--threads', type=int, default=8, help="Scanning threads.")
+        parser.add_argument('--yes', action='store_true', help="Confirm writing benchmark rows to the database.")
+
+    def handle(self, *args, **options):
+        if not options['yes']:
+            raise CommandError(
+                f"This creates and deletes participants in the {connection.vendor} database "
+                f"{connection.settings_dict['NAME']}; rerun with --yes to confirm."
+            )
+        if Participant.objects.filter(designation=BENCH_DESIGNATION).exists():
+            raise CommandError("Leftover benchmark participants found; delete designation=__bench_checkin__ first.")
+
+        self.stdout.write(f"database: {connection.vendor}")
+        user = User.objects.create(username='bench-checkin', email='bench-checkin@bench.invalid', is_active=False)
+        try:
+            tokens = self.create_participants(user, options['codes'])
+            with override_settings(QR_CODES_SINGLE_USE=True):
+                self.throughput(user, tokens, options['threads'])
+        finally:
+            Participant.objects.filter(designation=BENCH_DESIGNATION).delete()
+            user.delete()
+
+    def create_participants(self, user, count):
+        tokens = [new_qr_token() for _ in range(count)]
+        Participant.objects.bulk_create([
+            Participant(
+                username=f'bench{i}',
+                email=f'bench{i}@bench.invalid',
+                phone_number=f'B{i:09d}',
+                designation=BENCH_DESIGNATION,
+                qr_code_data=token,
+                registered_by=user,
+            )
+            for i, token in enumerate(tokens)
+        ], batch_size=500)
+        for token in tokens:
+            token_cache.add(token)
+        return tokens
+
+    def scan(self, token, user):
+        started = time.perf_counter()
+        try:
+            outcome, _ = check_in(token, user)
+        except Exception as e:
+            outcome = f"error: {type(e).__name__}"
+        return outcome, (time.perf_counter() - started) * 1000
+
+    def gate(self, tokens, user):
+        """One gate scanning `tokens` on its own DB connection."""
+        try:
+            return [self.scan(token, user) for token in tokens]
+        finally:
+            connection.close()
+
+    def throughput(self, user, tokens, threads):
+        started = time.perf_counter()
+        slices = [tokens[i::threads] for i in range(threads)]
+        with ThreadPoolExecutor(threads) as executor:
+            results = [result for gate_results in executor.map(lambda part: self.gate(part, user), slices)
+                       for result in gate_results]
+        elapsed = time.perf_counter() - started
+
+        latencies = np.asarray([latency for _, latency in results])
+        succeeded = sum(1 for outcome, _ in results if outcome == CHECKED_IN)
+        self.stdout.write(
+            f"throughput: {len(tokens)} codes on {threads} threads in {elapsed:.2f}s: "
+            f"{len(tokens) / elapsed:.0f} scans/s, {succeeded} checked in, "
+            f"p50={np.percentile(latencies, 50):.2f}ms p99={np.percentile(latencies, 99):.2f}ms"
+        )
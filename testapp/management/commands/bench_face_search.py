@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from testapp.face_index import l2_normalize
+from testapp.face_search import ExactSearch, IVFSearch
+
+
+class Command(BaseCommand):
+    help = "Compare recall and latency of the IVF face search against the exact scan on synthetic embeddings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help="Number of indexed faces.")
+        parser.add_argument('--dim', type=int, default=512, help="Embedding dimension (VGG-Face is 4096).")
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--lists', type=int, default=0, help="IVF lists (0 = sqrt(size)).")
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+        parser.add_argument('--noise', type=float, default=0.5, help="Query noise relative to the stored face.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        size, dim = options['size'], options['dim']
+        if size < IVFSearch.MIN_TRAIN_SIZE:
+            raise CommandError(
+                f"--size must be at least {IVFSearch.MIN_TRAIN_SIZE}; "
+                "smaller collections always use the exact scan."
+            )
+
+        # Faces cluster by appearance, so draw identities around shared centres
+        centres = rng.standard_normal((max(size // 100, 1), dim)).astype(np.float32)
+        vectors = centres[rng.integers(len(centres), size=size)]
+        vectors = l2_normalize(vectors + rng.standard_normal((size, dim)).astype(np.float32))
+
+        truth = rng.integers(size, size=options['queries'])
+        noise = rng.standard_normal((len(truth), dim)).astype(np.float32) * options['noise'] / np.sqrt(dim)
+        queries = l2_normalize(vectors[truth] + noise)
+
+        exact = ExactSearch.build(vectors)
+        exact_rows, exact_ms = self.run(exact, queries)
+        self.stdout.write(
+            f"exact        recall@1=1.000  p50={np.percentile(exact_ms, 50):.2f}ms  "
+            f"p99={np.percentile(exact_ms, 99):.2f}ms"
+        )
+
+        started = time.perf_counter()
+        ivf = IVFSearch.build(vectors, n_lists=options['lists'] or None, seed=options['seed'])
+        self.stdout.write(f"ivf trained in {time.perf_counter() - started:.1f}s with {len(ivf.centroids)} lists")
+
+        for n_probe in options['nprobe']:
+            ivf.n_probe = n_probe
+            rows, latencies = self.run(ivf, queries)
+            recall = float(np.mean(rows == exact_rows))
+            self.stdout.write(
+                f"ivf nprobe={n_probe:<3} recall@1={recall:.3f}  p50={np.percentile(latencies, 50):.2f}ms  "
+                f"p99={np.percentile(latencies, 99):.2f}ms"
+            )
+
+    def run(self, searcher, queries):
+        rows, latencies = [], []
+        for query in queries:
+            started = time.perf_counter()
+            row, _ = searcher.search(query[None, :])
+            latencies.append((time.perf_counter() - started) * 1000)
+            rows.append(row[0])
+        return np.asarray(rows), np.asarray(latencies)
@@ -0,0 +1,43 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from testapp import face_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the same camera frame to the running face worker from many concurrent clients "
+        "and report frames/sec. Compare runs of run_face_worker with --batch-size 1 and the default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('image', help="JPEG frame to send.")
+        parser.add_argument('--frames', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8, help="Simulated gate cameras.")
+
+    def handle(self, *args, **options):
+        if not settings.FACE_WORKER_SOCKET:
+            raise CommandError("FACE_WORKER_SOCKET is not set; start manage.py run_face_worker first.")
+
+        with open(options['image'], 'rb') as fh:
+            frame = fh.read()
+        face_worker.represent(frame)  # connect, and wait until the pool processes have warmed up
+
+        def send(_):
+            started = time.perf_counter()
+            face_worker.represent(frame)
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            latencies = np.asarray(list(executor.map(send, range(options['frames']))))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{options['frames']} frames in {elapsed:.2f}s: {options['frames'] / elapsed:.1f} frames/s, "
+            f"p50={np.percentile(latencies, 50):.0f}ms p99={np.percentile(latencies, 99):.0f}ms"
+        )
@@ -0,0 +1,83 @@
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import Http404
+from django.shortcuts import render
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import resolve
+
+# Stack and 404 handling as they were before the middleware cleanup
+LEGACY_MIDDLEWARE = [
+    'SampleQR.middleware.MetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'testapp.management.commands.bench_middleware.LegacyInvalidUrlMiddleware',
+]
+
+# Hot JSON APIs, requested without credentials so the views answer at once
+# and what is measured is the request path around them
+REQUESTS = [
+    ('post', '/api/verify_qr_code/', {'qr_code_data': '0' * 64}),
+    ('post', '/api/register/', {}),
+    ('get', '/api/exports/1/', None),
+    ('get', '/no/such/page/', None),
+]
+
+
+class LegacyInvalidUrlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            resolve(request.path)
+            response = self.get_response(request)
+        except Http404:
+            return render(request, '404.html', status=404)
+        return response
+
+
+class Command(BaseCommand):
+    help = "Compare per-request overhead of the old and current middleware stacks on the hot JSON APIs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per endpoint and stack.")
+        parser.add_argument('--rounds', type=int, default=5, help="Alternating rounds; the median is reported.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.ERROR)  # one warning per 4xx otherwise
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver'], METRICS_DIR=''):
+            for method, path, data in REQUESTS:
+                legacy, current = [], []
+                for _ in range(options['rounds']):
+                    with override_settings(MIDDLEWARE=LEGACY_MIDDLEWARE):
+                        legacy.append(self.measure(method, path, data, options['requests']))
+                    current.append(self.measure(method, path, data, options['requests']))
+                legacy_us, current_us = statistics.median(legacy), statistics.median(current)
+                self.stdout.write(
+                    f"{method.upper():4} {path:24} legacy {legacy_us:7.1f}us  current {current_us:7.1f}us  "
+                    f"saved {legacy_us - current_us:6.1f}us ({(1 - current_us / legacy_us) * 100:4.1f}%)"
+                )
+
+    def measure(self, method, path, data, count):
+        """Mean microseconds per request through the full handler."""
+        client = Client()
+        send = getattr(client, method)
+        send(path, data, content_type='application/json') if data is not None else send(path)  # warm up
+        started = time.perf_counter()
+        for _ in range(count):
+            if data is not None:
+                send(path, data, content_type='application/json')
+            else:
+                send(path)
+        return (time.perf_counter() - started) / count * 1e6
@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from testapp.listing import encode_cursor, list_participants
+from testapp.models import Participant, User
+from testapp.serializers import ParticipantSerializer
+from testapp.utils import new_qr_token
+
+BENCH_DESIGNATION = '__bench_list__'
+
+
+class Command(BaseCommand):
+    help = (
+        "Time api/participants/ pages at increasing depth (keyset cursor) against OFFSET paging. "
+        "Creates and removes its own participants in the configured database, so it only runs with --yes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=100000)
+        parser.add_argument('--limit', type=int, default=100, help="Page size.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per page; the best is reported.")
+        parser.add_argument('--yes', action='store_true', help="Confirm writing benchmark rows to the database.")
+
+    def handle(self, *args, **options):
+        if not options['yes']:
+            raise CommandError(
+                f"This creates and deletes {options['participants']} participants in the {connection.vendor} "
+                f"database {connection.settings_dict['NAME']}; rerun with --yes to confirm."
+            )
+        if Participant.objects.filter(designation=BENCH_DESIGNATION).exists():
+            raise CommandError("Leftover benchmark participants found; delete designation=__bench_list__ first.")
+
+        self.stdout.write(f"database: {connection.vendor}")
+        user = User.objects.create(username='bench-list', email='bench-list@bench.invalid', is_active=False)
+        try:
+            self.create_participants(user, options['participants'])
+            self.compare(options['participants'], options['limit'], options['repeat'])
+        finally:
+            Participant.objects.filter(designation=BENCH_DESIGNATION).delete()
+            user.delete()
+
+    def create_participants(self, user, count):
+        now = timezone.now()
+        batch = []
+        for i in range(count):
+            batch.append(Participant(
+                username=f'list{i}',
+                email=f'list{i}@bench.invalid',
+                phone_number=f'L{i:09d}',
+                designation=BENCH_DESIGNATION,
+                qr_code_data=new_qr_token(),
+                qr_verified=i % 3 == 0,
+                verified_by=user if i % 3 == 0 else None,
+                verified_at=now if i % 3 == 0 else None,
+                registered_by=user,
+            ))
+            if len(batch) == 5000:
+                Participant.objects.bulk_create(batch)
+                batch = []
+        Participant.objects.bulk_create(batch)
+        # bulk_create stamps every row with nearly the same created_at; spread them out
+        # so the cursor position depends on both columns, as in real data
+        for offset in range(0, count, 1000):
+            Participant.objects.filter(
+                designation=BENCH_DESIGNATION, phone_number__gte=f'L{offset:09d}', phone_number__lt=f'L{offset + 1000:09d}'
+            ).update(created_at=now - timedelta(seconds=count - offset))
+
+    def best_of(self, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings), len(queries)
+
+    def compare(self, total, limit, repeat):
+        ordered = Participant.objects.filter(designation=BENCH_DESIGNATION).order_by('-created_at', '-id')
+        params = {'designation': BENCH_DESIGNATION, 'limit': str(limit)}
+
+        for depth in (0, total // 10, total // 2, total - limit - 1):
+            cursor_params = dict(params)
+            if depth:
+                cursor_params['cursor'] = encode_cursor(ordered.only('id', 'created_at')[depth - 1])
+
+            def keyset():
+                participants, _ = list_participants(cursor_params)
+                ParticipantSerializer(participants, many=True).data
+
+            def offset():
+                participants = list(
+                    ordered.select_related('registered_by', 'verified_by')[depth:depth + limit]
+                )
+                ParticipantSerializer(participants, many=True).data
+
+            keyset_ms, keyset_queries = self.best_of(repeat, keyset)
+            offset_ms, offset_queries = self.best_of(repeat, offset)
+            self.stdout.write(
+                f"row {depth:>7}: keyset {keyset_ms:7.2f}ms ({keyset_queries} queries)   "
+                f"offset {offset_ms:7.2f}ms ({offset_queries} queries)"
+            )
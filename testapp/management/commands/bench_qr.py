@@ -0,0 +1,55 @@
+import time
+from io import BytesIO
+
+import qrcode
+from django.core.management.base import BaseCommand
+
+from testapp.qr_pool import QRCodePool
+from testapp.qr_render import render_png, render_svg
+from testapp.utils import new_qr_token
+
+
+def legacy_png(data: str) -> bytes:
+    """The previous renderer: best-fit version and mask search, RGB modules drawn one by one."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Measure QR codes generated per second by the legacy and current renderers and the QR pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help="QR codes rendered per renderer.")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        tokens = [new_qr_token(f'bench{i}') for i in range(count)]
+
+        baseline = None
+        for name, render in (('legacy png', legacy_png), ('png', render_png), ('svg', render_svg)):
+            started = time.perf_counter()
+            sizes = [len(render(token)) for token in tokens]
+            rate = count / (time.perf_counter() - started)
+            baseline = baseline or rate
+            self.stdout.write(
+                f"{name:<11} {rate:8.1f} codes/s  x{rate / baseline:5.1f}  avg {sum(sizes) / count / 1024:.1f} KiB"
+            )
+
+        pool = QRCodePool(count)
+        pool.warm()
+        while len(pool._items) < count:
+            time.sleep(0.05)
+        started = time.perf_counter()
+        for i in range(count):
+            pool.take(f'bench{i}')
+        rate = count / (time.perf_counter() - started)
+        self.stdout.write(f"{'pool take':<11} {rate:8.1f} codes/s  x{rate / baseline:5.1f}  (warm pool of {count})")
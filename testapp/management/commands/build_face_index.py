@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from testapp.face_index import store_embedding, has_face_image
+from testapp.models import Participant
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill the face embedding store used by verify_face_api. Only participants "
+        "without an up-to-date vector are embedded; run this before doors open."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-embed every participant photo.")
+
+    def handle(self, *args, **options):
+        stored = skipped = 0
+        for participant in Participant.objects.only('id', 'user_image').iterator():
+            if not has_face_image(participant):
+                skipped += 1
+                continue
+            try:
+                face_embedding = store_embedding(participant, force=options['force'])
+            except Exception as e:
+                self.stderr.write(f"Participant {participant.pk}: {str(e)}")
+                face_embedding = None
+            if face_embedding is None:
+                skipped += 1
+            else:
+                stored += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{stored} participant faces indexed, {skipped} skipped"))
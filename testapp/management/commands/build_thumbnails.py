@@ -0,0 +1,44 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from adminapp.models import Testimonial
+from testapp.models import Participant
+from testapp.thumbnails import generate_thumbnail, thumbnail_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the missing thumbnails of participant and testimonial photos uploaded before thumbnails existed, "
+        "so the first export does not have to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate thumbnails that already exist.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        names = set(Participant.objects.values_list('user_image', flat=True).iterator(chunk_size=options['batch_size']))
+        names.update(Testimonial.objects.exclude(user_image='').values_list('user_image', flat=True))
+        names.discard(None)
+        names.discard('')
+
+        created = skipped = failed = 0
+        for name in sorted(names):
+            if not options['force'] and os.path.exists(os.path.join(settings.MEDIA_ROOT, thumbnail_name(name))):
+                skipped += 1
+                continue
+            if not os.path.exists(os.path.join(settings.MEDIA_ROOT, name)):
+                failed += 1
+                self.stderr.write(f"Missing image {name}")
+                continue
+            try:
+                generate_thumbnail(name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Could not create thumbnail of {name}: {str(e)}")
+                continue
+            created += 1
+
+        self.stdout.write(f"Created {created} thumbnails, {skipped} already present, {failed} failed")
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Optional subsystems that must only load on first use (face recognition, Excel export)
+HEAVY_MODULES = ['deepface', 'tensorflow', 'tf_keras', 'keras', 'cv2', 'numpy', 'pandas', 'openpyxl']
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+resolver = get_resolver()
+for path in sys.argv[2:]:
+    resolver.resolve(path)
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed_ms": elapsed * 1000,
+    "loaded": [name for name in json.loads(sys.argv[1]) if name in sys.modules],
+}))
+"""
+
+DEFAULT_PATHS = [
+    '/', '/api/login/', '/api/register/', '/api/verify_qr_code/',
+    '/api/verify_face/', '/export/', '/download/',
+]
+
+
+def run_probe(modules=HEAVY_MODULES, paths=DEFAULT_PATHS) -> dict:
+    """
+    Set Django up and resolve `paths` in a fresh interpreter.
+
+    Returns:
+        Dict with 'elapsed_ms' and 'loaded' (those of `modules` that were imported)
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps(list(modules)), *paths],
+        capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Start-up probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Fail if django.setup() plus URL resolution imports a heavy optional subsystem "
+        "or exceeds the start-up time budget. Runs in a fresh interpreter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=1500)
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help="URL path to resolve (repeatable). Defaults to the hot API and page routes."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = run_probe(paths=options['paths'] or DEFAULT_PATHS)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"django.setup() + URL resolution: {report['elapsed_ms']:.0f}ms")
+
+        problems = []
+        if report['loaded']:
+            problems.append(f"heavy modules imported at start-up: {', '.join(report['loaded'])}")
+        if report['elapsed_ms'] > options['budget_ms']:
+            problems.append(f"start-up took {report['elapsed_ms']:.0f}ms (budget {options['budget_ms']:.0f}ms)")
+        if problems:
+            raise CommandError("; ".join(problems))
+
+        self.stdout.write(self.style.SUCCESS("Import budget OK"))
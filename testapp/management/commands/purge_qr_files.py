@@ -0,0 +1,47 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from testapp.models import Participant
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the QR PNGs stored under qr_codes/ and clear Participant.qr_code. "
+        "QR images are rendered on request from qr_code_data, so the files are no longer used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be deleted without deleting.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        files = freed = 0
+        purged_ids = []
+
+        stored = Participant.objects.exclude(qr_code='').values_list('id', 'qr_code')
+        for participant_id, name in stored.iterator(chunk_size=options['batch_size']):
+            try:
+                if default_storage.exists(name):
+                    freed += default_storage.size(name)
+                    files += 1
+                    if not dry_run:
+                        default_storage.delete(name)
+            except OSError as e:
+                self.stderr.write(f"Could not remove {name}: {str(e)}")
+                continue
+            purged_ids.append(participant_id)
+
+            if not dry_run and len(purged_ids) >= options['batch_size']:
+                self.clear(purged_ids)
+                purged_ids = []
+
+        if not dry_run and purged_ids:
+            self.clear(purged_ids)
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(f"{verb} {files} QR files ({freed / 1024 / 1024:.1f} MiB)")
+
+    def clear(self, ids):
+        # update() leaves updated_at alone, so exports and syncs don't see every row as changed
+        Participant.objects.filter(id__in=ids).update(qr_code='')
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from testapp.export_jobs import process_export_jobs
+
+
+class Command(BaseCommand):
+    help = "Build queued participant exports (Excel sheet / photo archive) into EXPORT_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the queued jobs once and exit.")
+        parser.add_argument('--interval', type=float, default=settings.EXPORT_JOB_POLL_INTERVAL,
+                            help="Seconds to sleep when no job is queued.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            ran = process_export_jobs()
+            if ran:
+                self.stdout.write(f"Built {ran} exports")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
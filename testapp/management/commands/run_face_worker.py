@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from testapp.face_worker import FaceWorkerServer
+
+
+class Command(BaseCommand):
+    help = "Run the face recognition worker pool that verify_face_api sends frames to."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.FACE_WORKER_SOCKET, help="Unix socket path to listen on.")
+        parser.add_argument('--processes', type=int, default=settings.FACE_WORKER_PROCESSES)
+        parser.add_argument('--batch-size', type=int, default=settings.FACE_BATCH_MAX_SIZE,
+                            help="Most frames embedded in one forward pass (1 disables batching).")
+        parser.add_argument('--batch-wait-ms', type=int, default=settings.FACE_BATCH_MAX_WAIT_MS,
+                            help="How long a frame may wait for others to join its batch.")
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError("Set FACE_WORKER_SOCKET or pass --socket.")
+        self.stdout.write(f"Starting face worker on {options['socket']} ({options['processes']} processes)")
+        FaceWorkerServer(
+            options['socket'],
+            options['processes'],
+            batch_size=options['batch_size'],
+            batch_wait_ms=options['batch_wait_ms'],
+        ).serve_forever()
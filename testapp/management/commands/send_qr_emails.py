@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from testapp.mailer import PooledMailSender
+from testapp.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued registration QR emails from the outbox, retrying with exponential backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process the due emails once and exit.")
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+                            help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        # One SMTP connection is kept open across batches instead of one per email
+        with PooledMailSender() as sender:
+            while True:
+                close_old_connections()
+                sent, failed = process_outbox(options['batch_size'], sender)
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent} QR emails, {failed} failed")
+                if options['once']:
+                    return
+                if sent + failed < options['batch_size']:
+                    sender.close_if_idle()
+                    time.sleep(options['interval'])
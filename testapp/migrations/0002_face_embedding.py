@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=50)),
+                ('source_image', models.CharField(max_length=255)),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('participant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='face_embedding', to='testapp.participant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model_name', 'updated_at'], name='testapp_fac_model_n_ccf411_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_as_sent(apps, schema_editor):
+    # Participants registered before the outbox got their email synchronously
+    Participant = apps.get_model('testapp', 'Participant')
+    Participant.objects.filter(qr_delivered=True).update(email_status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0002_face_embedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='email_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_as_sent, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_emails', to='testapp.participant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='testapp_ema_status_4c5197_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0003_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='participant',
+            name='qr_code',
+            field=models.ImageField(blank=True, upload_to='qr_codes/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0005_export_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['created_at', 'id'], name='testapp_par_created_8fcb35_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['qr_verified', 'created_at', 'id'], name='testapp_par_qr_veri_c44530_idx'),
+        ),
+    ]
@@ -1,9 +1,10 @@
 # models.py
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.core.files.base import ContentFile
+from django.utils import timezone
 import os
 from hashlib import sha256
 
@@ -36,6 +37,12 @@ def participant_image_upload_path(instance, filename):
     return f"participant_images/{filename}"
 
 class Participant(models.Model):
+    EMAIL_STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
     username = models.CharField(max_length=150)  # Allow duplicates
     email = models.EmailField(unique=True)
     phone_number = models.CharField(max_length=15, unique=True)
@@ -46,10 +53,12 @@ class Participant(models.Model):
         default='default/default_profile.jpg'
     )
 
-    qr_code = models.ImageField(upload_to="qr_codes/%Y/%m/")
+    # Legacy stored PNG; QR images are now rendered from qr_code_data on request (see qr_code_image)
+    qr_code = models.ImageField(upload_to="qr_codes/%Y/%m/", blank=True)
     qr_code_data = models.CharField(max_length=255, unique=True)
     qr_delivered = models.BooleanField(default=False)
     qr_verified = models.BooleanField(default=False)
+    email_status = models.CharField(max_length=10, choices=EMAIL_STATUS_CHOICES, default='pending')
 
     # Relations to User model
     registered_by = models.ForeignKey(
@@ -85,4 +94,149 @@ class Participant(models.Model):
             models.Index(fields=['phone_number']),
             models.Index(fields=['qr_code_data']),
             models.Index(fields=['created_at']),
+            # Keyset pagination of api/participants/ (all, and by check-in state)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['qr_verified', 'created_at', 'id']),
+        ]
+
+
+class EmailOutbox(models.Model):
+    """QR email waiting to be delivered by `manage.py send_qr_emails`."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    participant = models.ForeignKey(
+        Participant,
+        on_delete=models.CASCADE,
+        related_name='outbox_emails'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"QR email for {self.participant_id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
+class FaceEmbedding(models.Model):
+    """Persisted face vector of a participant photo, consumed by the face index."""
+    participant = models.OneToOneField(
+        Participant,
+        on_delete=models.CASCADE,
+        related_name='face_embedding'
+    )
+    model_name = models.CharField(max_length=50)
+    source_image = models.CharField(max_length=255)  # user_image name the vector was computed from
+    vector = models.BinaryField()  # float32 bytes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.participant_id} ({self.model_name})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_name', 'updated_at']),
+        ]
+
+
+@receiver(post_save, sender=Participant)
+def refresh_face_embedding(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Re-embed only this participant once their photo is committed."""
+    if raw or (update_fields is not None and 'user_image' not in update_fields):
+        return
+    if created and instance.user_image.name == instance._meta.get_field('user_image').default:
+        return  # registered without a photo: nothing to embed yet
+    from .face_index import schedule_embedding_update
+    participant_id = instance.pk
+    transaction.on_commit(lambda: schedule_embedding_update(participant_id))
+
+
+@receiver(post_save, sender=Participant)
+def refresh_participant_thumbnail(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Render the photo thumbnail in the background once the upload is committed, so nothing waits for it."""
+    if raw or (update_fields is not None and 'user_image' not in update_fields):
+        return
+    if instance.user_image.name == instance._meta.get_field('user_image').default:
+        return  # the shared default photo gets its thumbnail lazily, once
+    from .thumbnails import schedule_thumbnail_refresh
+    name = instance.user_image.name
+    transaction.on_commit(lambda: schedule_thumbnail_refresh(name))
+
+
+@receiver(post_save, sender=Participant)
+def announce_participant_token(sender, instance, created=False, **kwargs):
+    """Let the other workers' QR token caches know a new code exists."""
+    if created:
+        from .checkin import announce_new_tokens
+        transaction.on_commit(announce_new_tokens)
+
+
+@receiver(post_save, sender=FaceEmbedding)
+@receiver(post_delete, sender=FaceEmbedding)
+def announce_embedding_change(sender, **kwargs):
+    """Other workers' face indexes sync only after an announced change (with a shared cache)."""
+    from .face_index import announce_index_change
+    transaction.on_commit(announce_index_change)
+
+
+@receiver(post_delete, sender=Participant)
+def drop_face_embedding(sender, instance, **kwargs):
+    """The stored vector goes with the participant row (cascade); evict it locally too."""
+    from .face_index import discard_participant
+    discard_participant(instance.pk)
+
+
+class ExportJob(models.Model):
+    """Participant export built in the background by `manage.py run_export_jobs`."""
+    KIND_CHOICES = (
+        ('xlsx', 'Excel sheet'),
+        ('zip', 'Photo archive'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    source_signature = models.CharField(max_length=64)  # participant count + last change the artifact reflects
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs'
+    )
+    artifact = models.CharField(max_length=255, blank=True)  # file name under EXPORT_ROOT
+    size = models.PositiveBigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} export {self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['kind', 'source_signature']),
         ]
@@ -0,0 +1,147 @@
+# outbox.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .mailer import PooledMailSender
+from .models import EmailOutbox, Participant
+from .qr_render import get_qr_image
+from .utils import build_qr_email
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_qr_email(participant: Participant) -> EmailOutbox:
+    """Queue the registration QR email; call inside the registration transaction."""
+    return EmailOutbox.objects.create(participant=participant)
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Exponential backoff between delivery attempts, capped at EMAIL_OUTBOX_MAX_BACKOFF."""
+    seconds = settings.EMAIL_OUTBOX_BASE_BACKOFF * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_BACKOFF))
+
+
+def claim_due_emails(batch_size: int):
+    """
+    Mark up to `batch_size` due emails as sending and return them.
+
+    Rows stuck in 'sending' longer than EMAIL_OUTBOX_CLAIM_TIMEOUT (a worker
+    died mid-send) are picked up again. That counts as an attempt, so an
+    email that keeps killing its worker ends up failed after
+    EMAIL_OUTBOX_MAX_ATTEMPTS instead of being retried forever. On PostgreSQL
+    concurrent workers skip each other's rows instead of blocking.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        due = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now) |
+                Q(status='sending', updated_at__lt=stale)
+            )
+            .order_by('next_attempt_at')
+            .values_list('id', 'status', 'attempts')[:batch_size]
+        )
+        fresh = [pk for pk, status, _ in due if status == 'pending']
+        reclaimed, abandoned = [], []
+        for pk, status, attempts in due:
+            if status == 'sending':
+                (abandoned if attempts + 1 >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS else reclaimed).append(pk)
+
+        EmailOutbox.objects.filter(id__in=fresh).update(status='sending', updated_at=now)
+        EmailOutbox.objects.filter(id__in=reclaimed).update(
+            status='sending', attempts=F('attempts') + 1, updated_at=now
+        )
+        if abandoned:
+            logger.error(f"Giving up on QR emails {abandoned}: their worker stopped mid-send too often")
+            EmailOutbox.objects.filter(id__in=abandoned).update(
+                status='failed', attempts=F('attempts') + 1,
+                last_error='Worker stopped while sending.', updated_at=now
+            )
+            Participant.objects.filter(outbox_emails__id__in=abandoned).update(email_status='failed', updated_at=now)
+    return list(EmailOutbox.objects.filter(id__in=fresh + reclaimed).select_related('participant'))
+
+
+def qr_png_for(participant: Participant) -> bytes:
+    return get_qr_image(participant.qr_code_data, 'png')
+
+
+def record_sent(item: EmailOutbox) -> None:
+    now = timezone.now()
+    EmailOutbox.objects.filter(pk=item.pk).update(status='sent', sent_at=now, last_error='', updated_at=now)
+    # update() keeps the post_save face-embedding hook out of the mail worker
+    Participant.objects.filter(pk=item.participant_id).update(
+        email_status='sent', qr_delivered=True, updated_at=now
+    )
+
+
+def record_failure(item: EmailOutbox, error: Exception) -> None:
+    now = timezone.now()
+    attempts = item.attempts + 1
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        logger.error(f"Giving up on QR email {item.pk} after {attempts} attempts: {str(error)}")
+        EmailOutbox.objects.filter(pk=item.pk).update(
+            status='failed', attempts=attempts, last_error=str(error), updated_at=now
+        )
+        Participant.objects.filter(pk=item.participant_id).update(email_status='failed', updated_at=now)
+        return
+
+    logger.warning(f"QR email {item.pk} attempt {attempts} failed: {str(error)}")
+    EmailOutbox.objects.filter(pk=item.pk).update(
+        status='pending',
+        attempts=attempts,
+        last_error=str(error),
+        next_attempt_at=now + backoff_delay(attempts),
+        updated_at=now,
+    )
+
+
+def process_outbox(batch_size: int = None, sender: PooledMailSender = None):
+    """
+    Deliver one batch of due QR emails over a single mail connection.
+
+    Args:
+        batch_size: Emails to claim (defaults to EMAIL_OUTBOX_BATCH_SIZE)
+        sender: Connection to reuse across batches; a temporary one is used otherwise
+
+    Returns:
+        Tuple of (sent, failed) counts
+    """
+    items = claim_due_emails(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not items:
+        return 0, 0
+
+    messages, ready = [], []
+    failed = 0
+    for item in items:
+        participant = item.participant
+        try:
+            messages.append(build_qr_email(participant.email, participant.username, qr_png_for(participant)))
+        except Exception as e:
+            record_failure(item, e)
+            failed += 1
+        else:
+            ready.append(item)
+
+    if sender is None:
+        with PooledMailSender() as temporary_sender:
+            results = temporary_sender.send_batch(messages)
+    else:
+        results = sender.send_batch(messages)
+
+    sent = 0
+    for item, error in zip(ready, results):
+        if error is None:
+            record_sent(item)
+            sent += 1
+        else:
+            record_failure(item, error)
+            failed += 1
+    return sent, failed
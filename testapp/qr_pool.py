@@ -0,0 +1,76 @@
+# qr_pool.py
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+
+from .qr_render import get_qr_image, rendered_cache, render_png
+from .utils import new_qr_token
+
+logger = logging.getLogger(__name__)
+
+
+class QRCodePool:
+    """
+    Pre-generated (token, PNG) pairs for peak on-site registration.
+
+    Taking a code from the pool costs nothing on the request thread; a
+    background thread tops the pool back up to `size` whenever it drops
+    below half. Pool tokens are random and do not embed the username,
+    which the token never exposes anyway since it is a salted hash.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self.hits = self.misses = 0
+
+    def _refill(self) -> None:
+        try:
+            while len(self._items) < self.size:
+                token = new_qr_token()
+                self._items.append((token, render_png(token)))
+        except Exception as e:
+            logger.error(f"QR pool refill error: {str(e)}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _start_refill(self) -> None:
+        # Caller holds self._lock
+        if not self._refilling and len(self._items) < max(self.size // 2, 1):
+            self._refilling = True
+            threading.Thread(target=self._refill, name='qr-pool-refill', daemon=True).start()
+
+    def warm(self) -> None:
+        """Start filling the pool ahead of the first registration."""
+        if self.size > 0:
+            with self._lock:
+                self._start_refill()
+
+    def take(self, username: str):
+        """
+        Return a (token, PNG bytes) pair, from the pool when one is ready.
+
+        Falls back to rendering a fresh code for `username` when the pool is
+        disabled (QR_POOL_SIZE = 0) or has run dry.
+        """
+        if self.size > 0:
+            with self._lock:
+                item = self._items.popleft() if self._items else None
+                self._start_refill()
+            if item is not None:
+                self.hits += 1
+                # The QR endpoint is usually asked for this image right after registration
+                rendered_cache.put((item[0], 'png'), item[1])
+                return item
+            self.misses += 1
+
+        token = new_qr_token(username)
+        return token, get_qr_image(token, 'png')
+
+
+qr_pool = QRCodePool(settings.QR_POOL_SIZE)
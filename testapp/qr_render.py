@@ -0,0 +1,141 @@
+# qr_render.py
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha256
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from PIL import Image
+
+from SampleQR.metrics import timed
+
+ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_H
+BOX_SIZE = 10
+BORDER = 4
+
+
+@lru_cache(maxsize=16)
+def version_for_length(length: int) -> int:
+    """
+    Smallest QR version holding `length` bytes at the error correction we use.
+
+    QR tokens are always 64 hex characters, so this is worked out once instead
+    of re-running qrcode's best-fit search for every code.
+    """
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECTION)
+    qr.add_data('a' * length, optimize=0)
+    qr.make(fit=True)
+    return qr.version
+
+
+def qr_matrix(data: str, border: int = BORDER):
+    """Module matrix (including the quiet zone) of the QR code for `data`."""
+    qr = qrcode.QRCode(
+        version=version_for_length(len(data.encode())),
+        error_correction=ERROR_CORRECTION,
+        border=border,
+        mask_pattern=settings.QR_MASK_PATTERN,
+    )
+    qr.add_data(data, optimize=0)
+    qr.make(fit=False)
+    return qr.get_matrix()
+
+
+def render_png(data: str, box_size: int = BOX_SIZE) -> bytes:
+    """
+    Render the QR code as a 1-bit PNG.
+
+    The matrix is drawn one pixel per module and scaled up with nearest-neighbour
+    resampling, which is much cheaper than drawing every module as a rectangle.
+    """
+    matrix = qr_matrix(data)
+    size = len(matrix)
+    image = Image.new('1', (size, size))
+    image.putdata([0 if dark else 255 for row in matrix for dark in row])
+    if box_size > 1:
+        image = image.resize((size * box_size, size * box_size), Image.NEAREST)
+
+    buffer = BytesIO()
+    # optimize=True triples encode time to save under 100 bytes on a 1-bit image
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_svg(data: str, box_size: int = BOX_SIZE) -> bytes:
+    """Render the QR code as an SVG, one path segment per horizontal run of dark modules."""
+    matrix = qr_matrix(data)
+    size = len(matrix)
+    segments = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            segments.append(f'M{start},{y}h{x - start}v1h-{x - start}z')
+
+    pixels = size * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'width="{pixels}" height="{pixels}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(segments)}" fill="#000"/></svg>'
+    ).encode()
+
+
+RENDERERS = {'png': render_png, 'svg': render_svg}
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+class RenderedQRCache:
+    """LRU of rendered QR images keyed by (token, format)."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            image = self._items.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image: bytes) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = image
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+rendered_cache = RenderedQRCache(settings.QR_RENDER_CACHE_SIZE)
+
+
+def get_qr_image(data: str, fmt: str = 'png') -> bytes:
+    """Rendered QR image for `data`, served from the LRU when it was rendered recently."""
+    key = (data, fmt)
+    image = rendered_cache.get(key)
+    if image is None:
+        with timed('qr_render'):
+            image = RENDERERS[fmt](data)
+        rendered_cache.put(key, image)
+    return image
+
+
+def qr_image_etag(data: str, fmt: str) -> str:
+    """Strong ETag; the image only changes if the token or the rendering settings do."""
+    version = f"{data}:{fmt}:{settings.QR_MASK_PATTERN}:{BOX_SIZE}:{BORDER}"
+    return '"' + sha256(version.encode()).hexdigest()[:32] + '"'
@@ -1,6 +1,8 @@
 # serializers.py
+from django.urls import reverse
 from rest_framework import serializers
-from .models import User, Participant
+from .checkin import is_valid_token
+from .models import ExportJob, User, Participant
 
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -30,6 +32,7 @@ class ParticipantRegistrationSerializer(serializers.ModelSerializer):
 
 class ParticipantSerializer(serializers.ModelSerializer):
     user_image_url = serializers.SerializerMethodField()
+    qr_code_url = serializers.SerializerMethodField()
     verified_by = serializers.SerializerMethodField()
     registered_by = serializers.SerializerMethodField()
 
@@ -37,8 +40,8 @@ class ParticipantSerializer(serializers.ModelSerializer):
         model = Participant
         fields = [
             'id', 'username', 'email', 'phone_number', 'designation',
-            'user_image_url', 'qr_verified', 'verified_by', 'verified_at',
-            'registered_by', 'created_at'
+            'user_image_url', 'qr_code_url', 'qr_verified', 'verified_by', 'verified_at',
+            'registered_by', 'email_status', 'created_at'
         ]
 
     def get_user_image_url(self, obj):
@@ -46,6 +49,11 @@ class ParticipantSerializer(serializers.ModelSerializer):
             return obj.user_image.url
         return None
 
+    def get_qr_code_url(self, obj):
+        if not is_valid_token(obj.qr_code_data):
+            return None  # e.g. added in the admin, which leaves qr_code_data empty
+        return reverse('qr_code_image', kwargs={'token': obj.qr_code_data, 'fmt': 'png'})
+
     def get_verified_by(self, obj):
         if obj.verified_by:
             return obj.verified_by.username
@@ -55,3 +63,36 @@ class ParticipantSerializer(serializers.ModelSerializer):
         if obj.registered_by:
             return obj.registered_by.username
         return None
+
+class ParticipantImportRowSerializer(serializers.Serializer):
+    """
+    Field-level checks for one bulk-import row.
+
+    Uniqueness is checked for the whole file with set-based queries in
+    bulk_import.py rather than one query per row.
+    """
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField()
+    phone_number = serializers.CharField(max_length=15)
+    designation = serializers.CharField(max_length=255)
+
+    def validate_phone_number(self, value):
+        if len(value) != 10:
+            raise serializers.ValidationError("Phone number must be exactly 10 digits.")
+        return value
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'status', 'processed', 'total', 'size', 'error',
+            'download_url', 'created_at', 'started_at', 'finished_at'
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status == 'done':
+            return reverse('export_job_download', kwargs={'pk': obj.pk})
+        return None
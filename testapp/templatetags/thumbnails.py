@@ -0,0 +1,18 @@
+# thumbnails.py
+from django import template
+
+from testapp import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail_url(image, size=None):
+    """
+    URL of an image field's thumbnail: {{ testimonial.user_image|thumbnail_url }}.
+
+    Empty for a field without a file, so templates can test the result.
+    """
+    if not image:
+        return ''
+    return thumbnails.thumbnail_url(image.name, int(size) if size else None)
@@ -1,3 +1,52 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from .checkin import ALREADY_CHECKED_IN, CHECKED_IN, check_in
+from .management.commands.check_import_budget import run_probe
+from .models import Participant, User
+from .utils import new_qr_token
+
+
+class ImportBudgetTests(SimpleTestCase):
+    """Face recognition and the Excel export must only be imported on first use."""
+
+    def test_startup_does_not_import_heavy_modules(self):
+        heavy = ['deepface', 'tensorflow', 'cv2', 'numpy', 'pandas', 'openpyxl']
+        report = run_probe(modules=heavy)
+        self.assertEqual(report['loaded'], [])
+
+
+@override_settings(QR_CODES_SINGLE_USE=True, QR_TOKEN_CACHE=False)
+class ConcurrentCheckInTests(TransactionTestCase):
+    """Scans of one code racing on separate connections: exactly one checks the participant in."""
+
+    scanners = 8
+
+    def setUp(self):
+        self.user = User.objects.create(username='gate', email='gate@example.com')
+        self.token = new_qr_token()
+        Participant.objects.create(
+            username='racer', email='racer@example.com', phone_number='0000000000',
+            qr_code_data=self.token, registered_by=self.user,
+        )
+
+    def scan(self, start):
+        start.wait()
+        try:
+            return check_in(self.token, self.user)[0]
+        finally:
+            connection.close()
+
+    def test_one_scan_wins(self):
+        start = threading.Barrier(self.scanners)
+        with ThreadPoolExecutor(self.scanners) as executor:
+            outcomes = list(executor.map(lambda _: self.scan(start), range(self.scanners)))
+
+        self.assertEqual(outcomes.count(CHECKED_IN), 1, outcomes)
+        self.assertEqual(outcomes.count(ALREADY_CHECKED_IN), self.scanners - 1, outcomes)
+        participant = Participant.objects.get(qr_code_data=self.token)
+        self.assertTrue(participant.qr_verified)
+        self.assertEqual(participant.verified_by, self.user)
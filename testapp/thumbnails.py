@@ -0,0 +1,126 @@
+# thumbnails.py
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from SampleQR.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'thumbnails'
+
+FORMATS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+
+
+def thumbnail_name(name: str, size: int = None) -> str:
+    """
+    Media-relative name of the thumbnail of image `name`.
+
+    Thumbnails mirror the source path under thumbnails/<size>/, so every
+    source file has exactly one thumbnail per size and format.
+    """
+    size = size or settings.THUMBNAIL_SIZE
+    stem, _ = os.path.splitext(name)
+    return f"{THUMBNAIL_DIR}/{size}/{stem}.{FORMATS[settings.THUMBNAIL_FORMAT]}"
+
+
+def _media_path(name: str) -> str:
+    return os.path.join(settings.MEDIA_ROOT, name)
+
+
+@timed('image_encode')
+def generate_thumbnail(name: str, size: int = None) -> str:
+    """
+    Render the square thumbnail of image `name`, replacing any existing one.
+
+    Args:
+        name: Media-relative name of the source image
+        size: Edge length in pixels (THUMBNAIL_SIZE)
+
+    Returns:
+        Media-relative name of the thumbnail
+    """
+    size = size or settings.THUMBNAIL_SIZE
+    target = thumbnail_name(name, size)
+    target_path = _media_path(target)
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+    with Image.open(_media_path(name)) as image:
+        image.draft('RGB', (size, size))  # lets JPEG decode at a fraction of full resolution
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+    # Written next to the target and renamed, so readers never see a partial file
+    fd, partial_path = tempfile.mkstemp(dir=os.path.dirname(target_path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            thumbnail.save(fh, settings.THUMBNAIL_FORMAT, quality=settings.THUMBNAIL_QUALITY)
+        os.chmod(partial_path, settings.FILE_UPLOAD_PERMISSIONS or 0o644)  # mkstemp creates 0600; nginx serves these
+        os.replace(partial_path, target_path)
+    except Exception:
+        os.remove(partial_path)
+        raise
+    return target
+
+
+def get_thumbnail(name: str, size: int = None):
+    """
+    Name of the thumbnail of image `name`, generating it on first use.
+
+    Returns:
+        Media-relative thumbnail name, or None when the source image is
+        missing or cannot be read
+    """
+    if not name:
+        return None
+    target = thumbnail_name(name, size)
+    if os.path.exists(_media_path(target)):
+        return target
+    if not os.path.exists(_media_path(name)):
+        return None
+    try:
+        return generate_thumbnail(name, size)
+    except Exception as e:
+        logger.warning(f"Could not create thumbnail of {name}: {str(e)}")
+        return None
+
+
+def thumbnail_path(name: str, size: int = None):
+    """Filesystem path of the thumbnail of image `name`, or None (see get_thumbnail)."""
+    target = get_thumbnail(name, size)
+    return _media_path(target) if target else None
+
+
+def thumbnail_url(name: str, size: int = None) -> str:
+    """URL of the thumbnail of image `name`; falls back to the image itself when none can be made."""
+    if not name:
+        return ''
+    target = get_thumbnail(name, size)
+    return default_storage.url(target or name)
+
+
+def refresh_thumbnail(name: str) -> None:
+    """Regenerate the thumbnail of a newly uploaded image."""
+    try:
+        generate_thumbnail(name)
+    except Exception as e:
+        logger.warning(f"Could not create thumbnail of {name}: {str(e)}")
+
+
+# A single background thread keeps decoding and resizing off the request thread.
+_thumbnail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnail')
+
+
+def schedule_thumbnail_refresh(name: str) -> None:
+    """Queue refresh_thumbnail(name) (called from post_save hooks, after commit)."""
+    _thumbnail_executor.submit(refresh_thumbnail, name)
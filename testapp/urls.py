@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from .import views
 
 urlpatterns = [
@@ -8,14 +8,24 @@ urlpatterns = [
     path('api/logout/', views.logout_view, name='logout'),
 
     path('api/register/', views.register_participant, name='register'),
+    path('api/participants/', views.list_participants, name='list_participants'),
+    path('api/participants/import/', views.import_participants, name='import_participants'),
     path('api/verify_qr_code/', views.verify_participant, name='verify_qr_code'),
+    path('api/gate/bundle/', views.gate_bundle, name='gate_bundle'),
+    path('api/gate/sync/', views.gate_sync, name='gate_sync'),
+    re_path(r'^qr/(?P<token>[0-9a-f]{64})\.(?P<fmt>png|svg)$', views.qr_code_image, name='qr_code_image'),
 
     path('api/verify_face/', views.verify_face_api, name='verify_face_api'),
+    path('api/verify_face/cache_stats/', views.face_cache_stats, name='face_cache_stats'),
     path('verify_face/', views.verify_face, name='verify_face'),
     
     path('export/', views.export_participants_to_excel, name='export'),
     path('download/', views.download_all_images, name='download'),
 
+    path('api/exports/', views.create_export_job, name='create_export_job'),
+    path('api/exports/<int:pk>/', views.export_job_detail, name='export_job_detail'),
+    path('api/exports/<int:pk>/download/', views.export_job_download, name='export_job_download'),
+
 
 ]
 
@@ -1,5 +1,4 @@
 # utils.py
-import qrcode
 from io import BytesIO
 from typing import Tuple
 from django.core.mail import EmailMultiAlternatives
@@ -9,7 +8,8 @@ from django.utils.crypto import get_random_string
 from email.mime.image import MIMEImage
 import hashlib
 import logging
-from django.db import transaction
+
+from .qr_render import render_png
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +18,12 @@ def hash_qr_data(qr_data: str) -> str:
     salted_data = f"{qr_data}{settings.SECRET_KEY}"
     return hashlib.sha256(salted_data.encode()).hexdigest()
 
+def new_qr_token(username: str = '') -> str:
+    """Unguessable 64-character QR token for a participant."""
+    # Random component keeps tokens unique even for repeated usernames
+    unique_id = get_random_string(32)
+    return hash_qr_data(f"EVENT-{settings.EVENT_ID}-{username}-{unique_id}")
+
 def generate_secure_qr_code(username: str) -> Tuple[str, BytesIO]:
     """
     Generates a secure QR code.
@@ -29,71 +35,68 @@ def generate_secure_qr_code(username: str) -> Tuple[str, BytesIO]:
         Tuple containing QR data string and BytesIO buffer with QR image
     """
     try:
-        # Generate unique ID with timestamp for better uniqueness
-        unique_id = get_random_string(32)
-        qr_data = f"EVENT-{settings.EVENT_ID}-{username}-{unique_id}"
-        qr_data = hash_qr_data(qr_data)
-        
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        buffer = BytesIO()
-        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
-        buffer.seek(0)
-        
-        return qr_data, buffer
+        qr_data = new_qr_token(username)
+        return qr_data, BytesIO(render_png(qr_data))
     except Exception as e:
         logger.error(f"QR generation error: {str(e)}")
         raise
 
+def build_qr_email(email: str, username: str, qr_png: bytes) -> EmailMultiAlternatives:
+    """
+    Builds the registration email with the QR code attached inline.
+
+    Args:
+        email: Recipient address
+        username: Participant name used in the greeting
+        qr_png: PNG bytes of the QR code
+
+    Returns:
+        Message ready to be sent on any mail connection
+    """
+    context = {
+        'username': username,
+        'event_name': settings.EVENT_NAME,
+        'event_date': settings.EVENT_DATE,
+        'event_venue': getattr(settings, 'EVENT_VENUE', ''),
+        'event_time': getattr(settings, 'EVENT_TIME', ''),
+    }
+
+    html_content = render_to_string('emails/mail_index.html', context)
+    text_content = render_to_string('emails/qr_code.txt', context)
+
+    email_message = EmailMultiAlternatives(
+        subject=f"Your Registration QR Code for {settings.EVENT_NAME}",
+        body=text_content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+
+    # Attach QR code
+    qr_image = MIMEImage(qr_png)
+    qr_image.add_header('Content-ID', '<qr_code>')
+    qr_image.add_header('Content-Disposition', 'inline')
+    qr_image.add_header('X-Attachment-Id', 'qr_code')
+    email_message.attach(qr_image)
+
+    email_message.attach_alternative(html_content, "text/html")
+    return email_message
+
 def send_email_with_qr(email: str, username: str, qr_buffer: BytesIO) -> bool:
     """
-    Sends email with QR code using transaction and retry mechanism.
+    Sends email with QR code using retry mechanism.
     """
     MAX_RETRIES = 3
     retry_count = 0
 
+    qr_buffer.seek(0)
+    qr_png = qr_buffer.read()
+
     while retry_count < MAX_RETRIES:
         try:
-            with transaction.atomic():
-                context = {
-                    'username': username,
-                    'event_name': settings.EVENT_NAME,
-                    'event_date': settings.EVENT_DATE,
-                    'event_venue': getattr(settings, 'EVENT_VENUE', ''),
-                    'event_time': getattr(settings, 'EVENT_TIME', ''),
-                }
-                
-                html_content = render_to_string('emails/mail_index.html', context)
-                text_content = render_to_string('emails/qr_code.txt', context)
-
-                email_message = EmailMultiAlternatives(
-                    subject=f"Your Registration QR Code for {settings.EVENT_NAME}",
-                    body=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[email],
-                )
-                
-                # Attach QR code
-                qr_buffer.seek(0)
-                qr_image = MIMEImage(qr_buffer.read())
-                qr_image.add_header('Content-ID', '<qr_code>')
-                qr_image.add_header('Content-Disposition', 'inline')
-                qr_image.add_header('X-Attachment-Id', 'qr_code')
-                email_message.attach(qr_image)
-                
-                email_message.attach_alternative(html_content, "text/html")
-                
-                email_message.send(fail_silently=False)
-                logger.info(f"Successfully sent registration email to {email}")
-                return True
-                
+            build_qr_email(email, username, qr_png).send(fail_silently=False)
+            logger.info(f"Successfully sent registration email to {email}")
+            return True
+
         except Exception as e:
             retry_count += 1
             logger.warning(f"Email sending attempt {retry_count} failed: {str(e)}")
@@ -101,4 +104,4 @@ def send_email_with_qr(email: str, username: str, qr_buffer: BytesIO) -> bool:
                 logger.error(f"Failed to send email after {MAX_RETRIES} attempts: {str(e)}")
                 raise
     
-    return False
\ No newline at end of file
+    return False
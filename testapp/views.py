@@ -5,31 +5,48 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from django.utils import timezone
 from django.db import transaction
-from .models import User, Participant
-from adminapp.models import Testimonial
+from .models import ExportJob, User, Participant
 from .serializers import (
     UserLoginSerializer, UserSerializer,
-    ParticipantRegistrationSerializer, ParticipantSerializer
+    ParticipantRegistrationSerializer, ParticipantSerializer, ExportJobSerializer
 )
-from .utils import generate_secure_qr_code, send_email_with_qr
+from .qr_pool import qr_pool
+from .checkin import (
+    ALREADY_CHECKED_IN, CHECKED_IN, INVALID, check_in, parse_timestamp, sync_offline_scans, token_cache
+)
+from .outbox import enqueue_qr_email
+from .landing import render_landing_page
+from .listing import ListingError, list_participants as list_participant_page
+from . import face_worker
+from .face_worker import FaceWorkerError
+import json
 import logging
+import tempfile
 from django.shortcuts import render
-from django.core.files.base import ContentFile
-from deepface import DeepFace
-import cv2
-import numpy as numpy
 from django.conf import settings
 import os
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 
 logger = logging.getLogger(__name__)
 
 def index(request):
-    testimonials = Testimonial.objects.all()
-    return render(request, 'index.html', {'testimonials':testimonials})
+    """Landing page, served from the cache and answered with 304 when the visitor's copy is current."""
+    get_token(request)  # sets the csrftoken cookie the contact form posts with
+    page = render_landing_page(request)
+    last_modified = page['last_modified'].timestamp()
+    response = get_conditional_response(request, etag=page['etag'], last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(page['body'])
+    response['ETag'] = page['etag']
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)  # always revalidate, so testimonial edits show at once
+    return response
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -71,7 +88,6 @@ def logout_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@transaction.atomic
 def register_participant(request):
     try:
         serializer = ParticipantRegistrationSerializer(data=request.data)
@@ -79,39 +95,22 @@ def register_participant(request):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         validated_data = serializer.validated_data
-        qr_data, qr_buffer = generate_secure_qr_code(validated_data['username'])
-        
-        participant = Participant.objects.create(
-            **validated_data,
-            qr_code_data=qr_data,
-            registered_by=request.user,
-            qr_delivered=True
-        )
-
-        qr_buffer.seek(0)
-        participant.qr_code.save(
-            f'qr_code_{validated_data["username"]}.png',
-            ContentFile(qr_buffer.getvalue()),
-            save=True
-        )
-
-        try:
-            email_sent = send_email_with_qr(
-                validated_data['email'],
-                validated_data['username'],
-                qr_buffer
+        # The image itself is served by qr_code_image; the pool has already cached it
+        qr_data, _ = qr_pool.take(validated_data['username'])
+
+        with transaction.atomic():
+            participant = Participant.objects.create(
+                **validated_data,
+                qr_code_data=qr_data,
+                registered_by=request.user
             )
-            if not email_sent:
-                raise Exception("Failed to send email")
-        except Exception as e:
-            logger.error(f"Email sending failed: {str(e)}")
-            return Response({
-                "error": "Registration successful but email delivery failed. Please try again.",
-                "user": ParticipantSerializer(participant).data
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            # Commits together with the participant; `manage.py send_qr_emails` delivers it
+            enqueue_qr_email(participant)
+            transaction.on_commit(lambda: token_cache.add(qr_data))
 
         return Response({
-            "message": "Registration successful. Please check your email for the QR code.",
+            "message": "Registration successful. The QR code will be emailed shortly.",
             "user": ParticipantSerializer(participant).data
         }, status=status.HTTP_201_CREATED)
 
@@ -119,6 +118,40 @@ def register_participant(request):
         logger.error(f"Registration error: {str(e)}")
         return Response({"error": "Registration failed. Please try again."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_participants(request):
+    """
+    Bulk-register participants from an uploaded CSV/XLSX `file`.
+
+    Columns: username, email, phone_number, designation. Results are
+    streamed back as one JSON line per row followed by a summary line.
+    Pass `send_email=false` to skip queueing the QR emails.
+    """
+    from .bulk_import import ImportFileError, import_participants as run_import, read_rows
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "A CSV or XLSX file is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        rows = read_rows(upload)
+    except ImportFileError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    send_email = str(request.data.get('send_email', 'true')).lower() not in ('0', 'false', 'no')
+    user = request.user
+
+    def stream():
+        try:
+            for result in run_import(rows, registered_by=user, send_email=send_email):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"Bulk import error: {str(e)}")
+            yield json.dumps({"status": "failed", "error": "Import aborted. Rows reported above were saved."}) + "\n"
+
+    return StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def verify_participant(request):
@@ -127,59 +160,205 @@ def verify_participant(request):
         return Response({"error": "QR code data is required."}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        participant = Participant.objects.get(qr_code_data=qr_data)
-        
-        if participant.qr_verified:
-            return Response({"error": "This QR code has already been verified."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # participant.qr_verified = True
-        participant.qr_verified = False
-        participant.verified_by = request.user
-        participant.verified_at = timezone.now()
-        participant.save()
-        
-        return Response({
-            "message": "QR code verified successfully.",
-            "user": ParticipantSerializer(participant).data,
-            "qr_verified_not_unique":True
-        }, status=status.HTTP_200_OK)
-
-    except Participant.DoesNotExist:
-        return Response({"error": "Invalid QR code data. User not found."}, status=status.HTTP_404_NOT_FOUND)
+        outcome, participant = check_in(qr_data, request.user)
     except Exception as e:
         logger.error(f"Verification error: {str(e)}")
         return Response({"error": "An unexpected error occurred during verification."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    if outcome == INVALID:
+        return Response({"error": "Invalid QR code data. User not found."}, status=status.HTTP_404_NOT_FOUND)
+    if outcome == ALREADY_CHECKED_IN:
+        return Response({"error": "This QR code has already been verified."}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "message": "QR code verified successfully.",
+        "user": ParticipantSerializer(participant).data,
+        "qr_verified_not_unique": not settings.QR_CODES_SINGLE_USE
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def gate_bundle(request):
+    """
+    Signed snapshot of valid QR codes for scanners that verify offline.
+
+    Pass `since=<version>` from the previous bundle to get only the changes.
+    The X-Bundle-Signature header is an HMAC-SHA256 of the body with
+    GATE_BUNDLE_KEY, so devices can trust bundles passed around offline.
+    """
+    from .gate import build_bundle, sign
+
+    since = None
+    if request.GET.get('since'):
+        since = parse_timestamp(request.GET['since'])
+        if since is None:
+            return Response({"error": "since must be an ISO 8601 timestamp."}, status=status.HTTP_400_BAD_REQUEST)
+
+    body = build_bundle(since)
+    signature = sign(body)
+    etag = '"' + signature.split('=', 1)[1][:32] + '"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['X-Bundle-Signature'] = signature
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def gate_sync(request):
+    """
+    Upload check-ins a scanner recorded offline.
+
+    Body: {"scans": [{"qr_code_data": ..., "scanned_at": ...}, ...]}. The
+    earliest scan of a code wins, so devices may sync in any order and retry.
+    """
+    scans = request.data.get('scans')
+    if not isinstance(scans, list) or not scans:
+        return Response({"error": "scans must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(scans) > settings.GATE_SYNC_MAX_SCANS:
+        return Response(
+            {"error": f"At most {settings.GATE_SYNC_MAX_SCANS} scans per request."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        results = sync_offline_scans(scans, request.user)
+    except Exception as e:
+        logger.error(f"Gate sync error: {str(e)}")
+        return Response({"error": "Sync failed. Please retry."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        "results": results,
+        "checked_in": sum(1 for result in results if result['status'] == CHECKED_IN),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_participants(request):
+    """
+    Participants, newest first, one page at a time.
+
+    Filters: qr_verified, designation, verified_after / verified_before.
+    Pass `next_cursor` back as `cursor` for the following page; `limit`
+    sets the page size (PARTICIPANT_LIST_MAX_PAGE_SIZE at most).
+    """
+    try:
+        participants, next_cursor = list_participant_page(request.GET)
+    except ListingError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    return Response({
+        "results": ParticipantSerializer(participants, many=True).data,
+        "next_cursor": next_cursor,
+        "next": next_url,
+    }, status=status.HTTP_200_OK)
+
+
+def _recognize_frame(frame, scale, index):
+    """Detect, embed and match every face of a whole (downscaled) frame."""
+    faces = face_worker.represent(frame)
+    matches = index.search([face["embedding"] for face in faces], settings.FACE_MATCH_THRESHOLD)
+
+    face_data = []
+    for face, match in zip(faces, matches):
+        if match is None:
+            continue
+        participant_id, name, _ = match
+        area = face["facial_area"]
+        face_data.append({
+            "x": round(area["x"] / scale), "y": round(area["y"] / scale),
+            "width": round(area["w"] / scale), "height": round(area["h"] / scale),
+            "name": name, "participant_id": participant_id
+        })
+    return face_data
+
 
 def verify_face_api(request):
     
     if request.method == "POST":
         image = request.FILES.get('image')
-        
-        face_image = cv2.imdecode(numpy.frombuffer(image.read() , numpy.uint8), cv2.IMREAD_UNCHANGED)
-        
-        dfs = DeepFace.find(
-        img_path=face_image,
-        db_path = os.path.join(settings.BASE_DIR, 'media', 'participant_images'),
-        enforce_detection=False
-        )
+        if image is None:
+            return JsonResponse({"faces": [], "error": "Image is required."}, status=400)
+
+        # Imported here so cv2/NumPy stay out of workers that never verify faces
+        from .face_cache import result_cache, dhash, client_key
+        from .face_index import get_face_index
+        from .face_preprocess import decode_frame, parse_boxes, crop_faces
+
+        data = image.read()
+        try:
+            frame, scale = decode_frame(data)
+        except ValueError as e:
+            return JsonResponse({"faces": [], "error": str(e)}, status=400)
+
+        # Boxes found by face-api.js on the gate page spare the worker a full-frame detection
+        width, height = round(frame.shape[1] / scale), round(frame.shape[0] / scale)
+        boxes = parse_boxes(request.POST.get('boxes'), width, height)
+        client = client_key(request)
+
+        if not boxes:
+            # Never cached: the fixed background dominates a whole-frame hash, so a different
+            # person stepping in would look "near-identical" and inherit the previous identity
+            try:
+                face_data = _recognize_frame(frame, scale, get_face_index())
+            except FaceWorkerError as e:
+                logger.error(f"Face verification error: {str(e)}")
+                return JsonResponse({"faces": [], "error": "Face recognition is busy. Please retry."}, status=503)
+            return JsonResponse({"faces": face_data})
+
+        # The same person keeps standing at the gate: reuse results for near-identical crops
+        crops = crop_faces(frame, boxes, scale)
+        keys = [dhash(crop) for crop in crops]
+        matches = {}
+        for i, key in enumerate(keys):
+            hit, match = result_cache.get(client, key)
+            if hit:
+                matches[i] = match
+
+        missing = [i for i in range(len(crops)) if i not in matches]
+        if missing:
+            try:
+                results = face_worker.represent_many(
+                    [crops[i] for i in missing],
+                    max_faces=1,
+                    detector_backend=settings.FACE_CROP_DETECTOR_BACKEND
+                )
+            except FaceWorkerError as e:
+                logger.error(f"Face verification error: {str(e)}")
+                return JsonResponse({"faces": [], "error": "Face recognition is busy. Please retry."}, status=503)
+
+            embedded = [(i, result[0]["embedding"]) for i, result in zip(missing, results) if result]
+            # One matrix product against the worker-resident index instead of DeepFace.find
+            found = get_face_index().search(
+                [embedding for _, embedding in embedded],
+                settings.FACE_MATCH_THRESHOLD
+            )
+            for (i, _), match in zip(embedded, found):
+                matches[i] = match
+                result_cache.set(client, keys[i], match)
+
         face_data = []
-        for df in dfs:
-        
-            for index, instance in df.iterrows():
-                if instance["distance"] >0.1:
-                    source_path = instance["identity"]
-                    # extract facial area of the source image
-                    x = instance["target_x"]
-                    y = instance["target_y"]
-                    w = instance["target_w"]
-                    h = instance["target_h"]
-                    # Get the base filename
-                    file_name = os.path.basename(source_path)  # Aaron_Diaz.jpg
-
-                    # Remove the extension
-                    name_without_extension, _ = os.path.splitext(file_name)  # Aaron_Diaz
-                    face_data.append({"x":x, "y":y, "width": w, "height":h, "name":name_without_extension})
+        for i, (x, y, w, h) in enumerate(boxes):
+            match = matches.get(i)
+            if match is None:
+                continue
+            participant_id, name, _ = match
+            face_data.append({
+                "x": x, "y": y, "width": w, "height": h,
+                "name": name, "participant_id": participant_id
+            })
 
         return JsonResponse({"faces": face_data})  # JSON Response
         # return render(request,'verify_face.html')
@@ -190,131 +369,125 @@ def verify_face_api(request):
 def verify_face(request):
     return render(request,'verify_face.html')
 
-import os
-import zipfile
-from io import BytesIO
-from datetime import datetime
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.drawing.image import Image as ExcelImage
 
-from django.conf import settings
-from django.http import HttpResponse, JsonResponse
-from django.contrib.auth.decorators import login_required
-from django.utils.decorators import method_decorator
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
+@require_GET
+def qr_code_image(request, token, fmt):
+    """
+    Render a participant's QR code from its token instead of a stored file.
+
+    The token is an unguessable 64-character hash, so knowing it is what
+    grants access, as with the QR email itself. Images are immutable for a
+    given token and cached by clients.
+    """
+    from .qr_render import CONTENT_TYPES, get_qr_image, qr_image_etag
+
+    etag = qr_image_etag(token, fmt)
+    headers = {'ETag': etag, 'Cache-Control': f'private, max-age={settings.QR_IMAGE_MAX_AGE}, immutable'}
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        if not Participant.objects.filter(qr_code_data=token).exists():
+            raise Http404("Unknown QR code")
+        response = HttpResponse(get_qr_image(token, fmt), content_type=CONTENT_TYPES[fmt])
+    for header, value in headers.items():
+        response[header] = value
+    return response
 
-from .models import Participant
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.drawing.image import Image as ExcelImage
-import zipfile
-from io import BytesIO
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def face_cache_stats(request):
+    """Hit/miss counters of this worker's face result cache, for tuning FACE_CACHE_*."""
+    from .face_cache import result_cache
+    return Response(result_cache.stats())
 
 
 @api_view(["GET"])
 # @permission_classes([IsAuthenticated])  # Require JWT Token
 def export_participants_to_excel(request):
     """REST API to export participants' details to an Excel file including images."""
-    fields = [
-        "username", "email", "phone_number", "designation", "user_image",
-        "qr_code", "qr_code_data", "qr_delivered", "qr_verified",
-        "registered_by", "verified_by", "verified_at", "created_at", "updated_at"
-    ]
-
-    participants = Participant.objects.all().values(*fields)
-
-    # Create Excel workbook and sheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Participants"
-
-    # Define headers
-    headers = ["Username", "Email", "Phone Number", "Designation", "User Image",
-               "QR Code", "QR Code Data", "QR Delivered", "QR Verified",
-               "Registered By", "Verified By", "Verified At", "Created At", "Updated At"]
-    
-    ws.append(headers)
-
-    # Set column widths & row heights (for images)
-    column_widths = [20, 30, 15, 20, 15, 15, 20, 10, 10, 20, 20, 20, 20, 20]
-    for i, width in enumerate(column_widths, start=1):
-        ws.column_dimensions[ws.cell(row=1, column=i).column_letter].width = width
-
-    img_height = 50  # Set row height to fit images
-    for row_idx in range(2, len(participants) + 2):
-        ws.row_dimensions[row_idx].height = img_height
-
-    media_root = settings.MEDIA_ROOT  # Get media root path
-
-    for idx, participant in enumerate(participants, start=2):  # Start from row 2
-        row_data = [
-            participant["username"],
-            participant["email"],
-            participant["phone_number"],
-            participant["designation"],
-            "",  # Placeholder for user image
-            "",  # Placeholder for QR code
-            participant["qr_code_data"],
-            participant["qr_delivered"],
-            participant["qr_verified"],
-            participant["registered_by"] or "N/A",
-            participant["verified_by"] or "N/A",
-            participant["verified_at"].replace(tzinfo=None) if participant["verified_at"] else "",
-            participant["created_at"].replace(tzinfo=None) if participant["created_at"] else "",
-            participant["updated_at"].replace(tzinfo=None) if participant["updated_at"] else "",
-        ]
-
-        # Add row data
-        ws.append(row_data)
-
-        # Insert user image
-        user_image_path = participant["user_image"]
-        if user_image_path:
-            full_path = os.path.join(media_root, user_image_path)
-            if os.path.exists(full_path):
-                img = ExcelImage(full_path)
-                img.width, img.height = 50, 50
-                img.anchor = f"E{idx}"  # Insert into column E
-                ws.add_image(img)
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="participants_with_images.xlsx"'
+    # openpyxl is only loaded once somebody actually asks for an export
+    from .exports import write_participants_workbook
 
-    with BytesIO() as output:
-        wb.save(output)
+    # Built on disk and streamed from there; FileResponse deletes it once sent
+    output = tempfile.TemporaryFile(suffix=".xlsx")
+    try:
+        write_participants_workbook(output)
         output.seek(0)
-        response.write(output.getvalue())
-
-    return response
+    except Exception:
+        output.close()
+        raise
+
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename="participants_with_images.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 
 @api_view(["GET"])
 # @permission_classes([IsAuthenticated])  # Require JWT Token
 def download_all_images(request):
-    """REST API to create and download a ZIP file containing all participant images."""
-    
-    zip_buffer = BytesIO()
-    zip_file = zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED)
-    media_root = settings.MEDIA_ROOT  # Base directory for media files
+    """REST API to download a ZIP file containing all participant images, streamed as it is built."""
+    from .exports import stream_images_zip
+
+    response = StreamingHttpResponse(stream_images_zip(), content_type="application/zip")
+    response["Content-Disposition"] = 'attachment; filename="participant_images.zip"'
 
-    participants = Participant.objects.all()
+    return response
 
-    for participant in participants:
-        if participant.user_image:
-            user_image_path = os.path.join(media_root, participant.user_image.name)
-            if os.path.exists(user_image_path):
-                zip_file.write(user_image_path, f"user_images/{os.path.basename(user_image_path)}")
 
-    zip_file.close()
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_export_job(request):
+    """
+    Queue a background build of the Excel sheet (`kind=xlsx`) or photo archive (`kind=zip`).
+
+    Poll the returned job until `status` is done, then fetch `download_url`.
+    An artifact of unchanged participant data is returned straight away.
+    """
+    from .export_jobs import ARTIFACTS, request_export
+
+    kind = request.data.get('kind')
+    if kind not in ARTIFACTS:
+        return Response({"error": "kind must be 'xlsx' or 'zip'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    job, created = request_export(kind, request.user)
+    return Response(
+        ExportJobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED if job.status != 'done' else status.HTTP_200_OK
+    )
 
-    zip_buffer.seek(0)
-    response = HttpResponse(zip_buffer.getvalue(), content_type="application/zip")
-    response["Content-Disposition"] = 'attachment; filename="participant_images.zip"'
 
-    return response
\ No newline at end of file
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_job_detail(request, pk):
+    try:
+        job = ExportJob.objects.get(pk=pk)
+    except ExportJob.DoesNotExist:
+        return Response({"error": "Export not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ExportJobSerializer(job).data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_job_download(request, pk):
+    """Serve a finished export; behind nginx the file is sent by nginx itself via X-Accel-Redirect."""
+    from .export_jobs import ARTIFACTS, artifact_path
+
+    try:
+        job = ExportJob.objects.get(pk=pk)
+    except ExportJob.DoesNotExist:
+        return Response({"error": "Export not found."}, status=status.HTTP_404_NOT_FOUND)
+    if job.status != 'done' or not os.path.exists(artifact_path(job)):
+        return Response({"error": "Export is not ready."}, status=status.HTTP_409_CONFLICT)
+
+    filename, content_type = ARTIFACTS[job.kind]
+    if settings.EXPORT_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.EXPORT_ACCEL_REDIRECT_PREFIX + job.artifact
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+    return FileResponse(open(artifact_path(job), "rb"), as_attachment=True, filename=filename, content_type=content_type)
+